@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import PostgresDsn, ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -11,13 +13,91 @@ class Settings(BaseSettings):
     # ------------- DB ----------------------------------------------
     PSQL_URL: PostgresDsn
 
+    # ------------- STARTUP -----------------------------------------
+    STARTUP_BACKGROUND_INIT: bool = True
+
+    # ------------- CACHE -------------------------------------------
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_SIZE: int = 1024
+    CACHE_LISTENER_RECONNECT_DELAY: int = 5
+
+    # ------------- ACTIVITY ----------------------------------------
+    ACTIVITY_SYNC_CONCURRENCY: int = 8
+    ACTIVITY_STALENESS: int = 3600
+    ACTIVITY_COLD_SYNC_CONCURRENCY: int = 4
+    ACTIVITY_COLD_SYNC_QUEUE: int = 32
+    ACTIVITY_RETRY_AFTER: int = 5
+    ACTIVITY_REFRESH_CONCURRENCY: int = 2
+    ACTIVITY_REFRESH_QUEUE: int = 64
+    ACTIVITY_WRITE_BATCH_SIZE: int = 5000
+    ACTIVITY_WRITE_DELAY: float = 1.0
+    ACTIVITY_WRITE_RETRIES: int = 3
+    ACTIVITY_CHECKPOINT_PAGES: int = 5
+    ACTIVITY_CHECKPOINT_TTL: int = 86400
+    ACTIVITY_COLUMNAR_ENABLED: bool = False
+    ACTIVITY_COLUMNAR_MAX_REPOS: int = 1000
+    ACTIVITY_COLUMNAR_REFRESH_DAYS: int = 7
+    NEGATIVE_CACHE_TTL: int = 600
+    NEGATIVE_CACHE_MAX_SIZE: int = 10000
+
+    # ------------- MOVERS ------------------------------------------
+    MOVERS_MAX_AGE: int = 60
+
+    # ------------- FETCH -------------------------------------------
+    FETCH_EXECUTOR: Literal["inprocess", "process", "remote"] | None = None
+    FETCH_WORKER_URL: str | None = None
+    FETCH_PROCESS_WORKERS: int = 2
+    FETCH_TIMEOUT: float = 120
+    FETCH_RETRIES: int = 2
+
+    # ------------- GITHUB ------------------------------------------
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_TIMEOUT: float = 10
+    GITHUB_DEADLINE: float = 60
+    GITHUB_RETRIES: int = 3
+    GITHUB_BACKOFF_BASE: float = 0.5
+    GITHUB_BACKOFF_MAX: float = 8
+    GITHUB_BREAKER_THRESHOLD: int = 5
+    GITHUB_BREAKER_RESET: float = 30
+
+    # ------------- EXPORT ------------------------------------------
+    EXPORT_PREFETCH: int = 1000
+
+    # ------------- PROFILING ---------------------------------------
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_KEEP: int = 20
+    ADMIN_TOKEN: str | None = None
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL: float = 0.05
+    LOOP_MONITOR_THRESHOLD: float = 0.25
+
+    # ------------- LOGGING -----------------------------------------
+    LOG_FORMAT: Literal["color", "json"] = "color"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_MAX_LENGTH: int = 4000
+    LOG_MAX_QUERY: int = 500
+    LOG_SAMPLE_WINDOW: float = 10
+    LOG_SAMPLE_BURST: int = 20
+
     # ------------- OTHER -------------------------------------------
     YCF_URL: str | None = None
     TOKEN: str | None = None
+    TOKENS: list[str] = []
 
     def __init__(self):
         super().__init__()
-        assert not (self.YCF_URL is None and self.TOKEN is None), "One of the parameters is required: YCF_URL or TOKEN"
+        assert not (self.YCF_URL is None and self.TOKEN is None and not self.TOKENS), \
+            "One of the parameters is required: YCF_URL, TOKEN or TOKENS"
+
+    @property
+    def github_tokens(self) -> list[str]:
+        """
+        All GitHub tokens available to the parser.
+        """
+
+        return self.TOKENS + ([self.TOKEN] if self.TOKEN else [])
 
 
 settings = Settings()
@@ -24,6 +24,26 @@ class RateLimitExceeded(Exception):
     pass
 
 
+class ServiceOverloaded(Exception):
+    """
+    Exception raised when the service can't accept more work right now.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class GitHubUnavailable(Exception):
+    """
+    Exception raised when github.com keeps failing or timing out, so requests to it are stopped for a while.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
 def handle_exception(request: Request, e: Exception) -> JSONResponse:
     """
     Handles exceptions by returning an appropriate JSONResponse with status code and message.
@@ -33,9 +53,18 @@ def handle_exception(request: Request, e: Exception) -> JSONResponse:
     :return: JSONResponse containing the error message and status code.
     """
 
+    headers = dict()
     if isinstance(e, RateLimitExceeded):
         status_code = status.HTTP_403_FORBIDDEN
         msg = "Exceeded API rate limit for github.com. Try again later"
+    elif isinstance(e, ServiceOverloaded):
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        msg = "Too many requests are waiting for data from github.com. Try again later"
+        headers["Retry-After"] = str(e.retry_after)
+    elif isinstance(e, GitHubUnavailable):
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        msg = "github.com is unavailable. Try again later"
+        headers["Retry-After"] = str(e.retry_after)
     else:
         status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
         msg = f"{type(e).__name__}: {e}"
@@ -44,5 +73,6 @@ def handle_exception(request: Request, e: Exception) -> JSONResponse:
         status_code=status_code,
         content={
             "message": msg
-        }
+        },
+        headers=headers
     )
@@ -1,14 +1,19 @@
+import asyncio
+
 from fastapi import FastAPI, Request
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
 from app.core import settings
 from app.routers import api_router
+from app.services.activity_crawls import activity_crawls_service
+from app.services.movers import movers_service
 from app.services.repo_activity import repo_activity_service
 from app.services.repos import repos_service
-from .exceptions import handle_exception
-from .logging_config import logger
-from ..utils.scheduler import configure_scheduler
+from .exceptions import GitHubUnavailable, RateLimitExceeded, ServiceOverloaded, handle_exception
+from .logging_config import RequestIdMiddleware, logger
+from .profiling import ProfilingMiddleware
+from ..utils import executors
 
 
 def get_application() -> FastAPI:
@@ -28,31 +33,82 @@ def get_application() -> FastAPI:
         allow_headers=["*"],
     )
 
-    @_app.on_event("startup")
-    async def on_startup():
+    if settings.PROFILING_ENABLED:
+        _app.add_middleware(ProfilingMiddleware)
+
+    _app.add_middleware(RequestIdMiddleware)
+
+    services = [
+        repos_service,
+        repo_activity_service,
+        activity_crawls_service,
+        movers_service
+    ]
+
+    async def initialize():
         """
-        Initializes services on application startup.
+        Creates the tables and loads the top repositories if the database is empty.
         """
 
-        services = [
-            repos_service,
-            repo_activity_service
-        ]
         for service in services:
             await service.create_table()
+            if settings.CACHE_ENABLED and service.cached:
+                await service.listen()
 
         logger.info("Database is ready for use")
         await repos_service.init_top_repos_on_startup()
 
+    def on_initialized(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Can't initialize the application. Error: {task.exception()}")
+
+    @_app.on_event("startup")
+    async def on_startup():
+        """
+        Initializes services on application startup.
+
+        With STARTUP_BACKGROUND_INIT the initialization runs in the background, so the application accepts
+        requests immediately and /api/health/ready reports when the data is available.
+        """
+
+        if settings.LOOP_MONITOR_ENABLED:
+            # Imported here to keep importing the application cheap
+            from ..utils.loop_monitor import LoopMonitor
+
+            _app.state.loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_MONITOR_THRESHOLD)
+            _app.state.loop_monitor.start()
+
+        if settings.STARTUP_BACKGROUND_INIT:
+            _app.state.init_task = asyncio.create_task(initialize())
+            _app.state.init_task.add_done_callback(on_initialized)
+        else:
+            await initialize()
+
+        if settings.YCF_URL is None:
+            # Imported here to keep importing the application cheap
+            from ..utils.scheduler import configure_scheduler
+
+            _app.state.scheduler = configure_scheduler()
+            _app.state.scheduler.start()
+
     @_app.on_event("shutdown")
     async def shutdown():
-        services = [
-            repos_service,
-            repo_activity_service
-        ]
+        if (init_task := getattr(_app.state, "init_task", None)) is not None:
+            init_task.cancel()
+
+        if (scheduler := getattr(_app.state, "scheduler", None)) is not None:
+            scheduler.shutdown(wait=False)
+
+        await repo_activity_service.drain()
+
         for service in services:
             await service.close_connection()
 
+        await executors.fetch_executor.close()
+
+        if (loop_monitor := getattr(_app.state, "loop_monitor", None)) is not None:
+            loop_monitor.stop()
+
     @_app.exception_handler(Exception)
     def _app_exception_handler(request: Request, e: Exception) -> JSONResponse:
         """
@@ -65,10 +121,11 @@ def get_application() -> FastAPI:
 
         return handle_exception(request, e)
 
-    _app.include_router(api_router)
+    # Handlers of Exception run in ServerErrorMiddleware, which logs the traceback and re-raises after responding,
+    # and skip the CORS headers. Expected errors are handled inside the middleware stack instead.
+    for exception in (RateLimitExceeded, ServiceOverloaded, GitHubUnavailable):
+        _app.add_exception_handler(exception, _app_exception_handler)
 
-    if settings.YCF_URL is None:
-        scheduler = configure_scheduler()
-        scheduler.start()
+    _app.include_router(api_router)
 
     return _app
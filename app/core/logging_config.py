@@ -1,47 +1,242 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import re
 import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import settings
+from app.utils.metrics import metrics
+
+# ID and start time of the request being handled, propagated to the threads started with asyncio.to_thread
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_request_started: ContextVar[float | None] = ContextVar("request_started", default=None)
+# Request IDs taken from the clients, other values are replaced with generated IDs
+_valid_request_id = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+def shorten(text: str, limit: int) -> str:
+    """
+    Truncates a text for logging.
+
+    :param text: Text to truncate.
+    :param limit: Maximum number of characters to keep.
+    :return: The text, truncated with a note of the number of dropped characters if it's longer than the limit.
+    """
+
+    if len(text) <= limit:
+        return text
+
+    return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+
+
+class ColoredFormatter(logging.Formatter):
+    """
+    Formatter of human-readable records with the level colored by severity.
+    """
+
+    green = "\033[92m"
+    blue = "\033[94m"
+    yellow = "\x1b[33;20m"
+    red = "\x1b[31;20m"
+    bold_red = "\x1b[31;1m"
+    reset = "\x1b[0m"
+
+    _formats = {
+        logging.DEBUG: f"{blue}%(levelname)s{reset}:\t%(message)s",
+        logging.INFO: f"{green}%(levelname)s{reset}:\t%(message)s",
+        logging.WARNING: f"{yellow}%(levelname)s{reset}:\t%(message)s",
+        logging.ERROR: f"{red}%(levelname)s{reset}:\t%(message)s",
+        logging.CRITICAL: f"{bold_red}%(levelname)s{reset}:\t%(message)s"
+    }
+
+    def __init__(self):
+        super().__init__()
+        # Created once, not for every record
+        self._formatters = {level: logging.Formatter(fmt) for level, fmt in self._formats.items()}
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self._formatters.get(record.levelno, self._formatters[logging.INFO]).format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter of records as single-line JSON objects with the request ID and timing fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        item = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "request_elapsed_ms": getattr(record, "request_elapsed_ms", None),
+        }
+        if (suppressed := getattr(record, "suppressed", 0)) > 0:
+            item["suppressed"] = suppressed
+        if record.exc_info:
+            item["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            item["exc_info"] = record.exc_text
+
+        return json.dumps(item, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds the request ID and the time since the start of the request to the records.
+
+    Runs in the thread emitting the record, where the context of the request is available.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        started = _request_started.get()
+        record.request_elapsed_ms = round((time.perf_counter() - started) * 1000, 3) if started is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Truncates long messages and samples repeated ones.
+
+    Records from the same line of code are passed at most `burst` times per `window` seconds, the number of dropped
+    records is attached to the next passed one as `suppressed`.
+    """
+
+    def __init__(self, max_length: int, window: float, burst: int):
+        super().__init__()
+        self._max_length = max_length
+        self._window = window
+        self._burst = burst
+        self._lock = threading.Lock()
+        # Call site -> (start of the window, passed records, dropped records)
+        self._sites: dict[tuple[str, int], tuple[float, int, int]] = dict()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            started, passed, dropped = self._sites.get(key, (now, 0, 0))
+            if now - started >= self._window:
+                started, passed = now, 0
+
+            if passed >= self._burst:
+                self._sites[key] = (started, passed, dropped + 1)
+                return False
+
+            self._sites[key] = (started, passed + 1, 0)
+
+        record.suppressed = dropped
+        if dropped:
+            record.msg, record.args = f"{record.getMessage()} [{dropped} similar messages suppressed]", None
+
+        message = record.getMessage()
+        if len(message) > self._max_length:
+            record.msg, record.args = shorten(message, self._max_length), None
+
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records when the queue is full instead of blocking the caller.
+    Dropped records are counted by the `log_records_dropped` counter.
+    """
+
+    dropped = 0
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the default, the exception is kept apart from the message, so the formatters can render it
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("log_records_dropped")
+
+
+class RequestIdMiddleware:
+    """
+    Sets the ID of every request for logging, taken from the X-Request-ID header or generated,
+    and returns it in the X-Request-ID header of the response.
+
+    Header values are latin-1, only IDs of up to 128 letters, digits and `._:-` are taken from the clients.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-request-id"), "")
+        if not _valid_request_id.fullmatch(value):
+            value = uuid.uuid4().hex
+        id_token = request_id.set(value)
+        started_token = _request_started.set(time.perf_counter())
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-request-id", value.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(id_token)
+            _request_started.reset(started_token)
 
 
 def get_logger(level: int = logging.DEBUG, turn_off_another_logs: bool = False):
     """
-    Configures and returns a custom logger with colored output.
+    Configures and returns a custom logger.
+
+    Records are put to a bounded queue and written to stdout by a background thread, so logging never blocks
+    the event loop. The records are colored text or JSON objects, as set by LOG_FORMAT.
 
     :param level: Logging level for the logger (default is logging.DEBUG).
     :param turn_off_another_logs: If True, turns off logging for all other loggers (default is False).
     :return: Configured logger instance.
     """
 
-    class ColoredFormatter(logging.Formatter):
-        green = "\033[92m"
-        blue = "\033[94m"
-        yellow = "\x1b[33;20m"
-        red = "\x1b[31;20m"
-        bold_red = "\x1b[31;1m"
-        reset = "\x1b[0m"
-
-        _formats = {
-            logging.DEBUG: f"{blue}%(levelname)s{reset}:\t%(message)s",
-            logging.INFO: f"{green}%(levelname)s{reset}:\t%(message)s",
-            logging.WARNING: f"{yellow}%(levelname)s{reset}:\t%(message)s",
-            logging.ERROR: f"{red}%(levelname)s{reset}:\t%(message)s",
-            logging.CRITICAL: f"{bold_red}%(levelname)s{reset}:\t%(message)s"
-        }
-
-        def format(self, record):
-            log_fmt = self._formats.get(record.levelno)
-            formatter = logging.Formatter(log_fmt)
-            return formatter.format(record)
-
     if turn_off_another_logs:
         for lg in [logging.getLogger(name) for name in logging.root.manager.loggerDict]:
             lg.handlers = []
             lg.propagate = False
 
     _logger = logging.getLogger(__name__)
-    _logger.setLevel(logging.DEBUG)
 
-    handler = logging.StreamHandler(stream=sys.stdout)
-    handler.setFormatter(ColoredFormatter())
+    stream_handler = logging.StreamHandler(stream=sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else ColoredFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter(settings.LOG_MAX_LENGTH, settings.LOG_SAMPLE_WINDOW, settings.LOG_SAMPLE_BURST))
+    handler.addFilter(ContextFilter())
+
+    listener = QueueListener(handler.queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Writes the queued records before the interpreter exits
+    atexit.register(listener.stop)
 
     _logger.addHandler(handler)
     _logger.setLevel(level)
@@ -0,0 +1,159 @@
+import cProfile
+import heapq
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import settings
+
+
+@dataclass
+class Span:
+    """
+    Timed operation within a profiled request, e.g. a GitHub request or a DB query.
+    """
+
+    kind: str
+    name: str
+    start: float
+    duration: float
+
+
+@dataclass
+class Trace:
+    """
+    Profile of a single request.
+    """
+
+    method: str
+    path: str
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    spans: list[Span] = field(default_factory=list)
+    profile: str | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "spans": [span.__dict__ for span in self.spans],
+            "profile": self.profile,
+        }
+
+
+class SlowestTraces:
+    """
+    Keeps the N slowest traces.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._heap: list[tuple[float, int, Trace]] = list()
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            item = (trace.duration, next(self._counter), trace)
+            if len(self._heap) < self._size:
+                heapq.heappush(self._heap, item)
+            elif trace.duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def list(self) -> list[Trace]:
+        """
+        Returns the kept traces, the slowest first.
+        """
+
+        with self._lock:
+            return [trace for _, _, trace in sorted(self._heap, reverse=True)]
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_profiler_lock = threading.Lock()
+
+slowest_traces = SlowestTraces(settings.PROFILING_KEEP)
+
+
+@contextmanager
+def span(kind: str, name: str) -> Iterator[None]:
+    """
+    Records the duration of an operation into the trace of the current request, if the request is profiled.
+
+    :param kind: Kind of the operation, e.g. 'github' or 'db'.
+    :param name: Name of the operation, e.g. URL or query.
+    """
+
+    if (trace := _current_trace.get()) is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        finished = time.perf_counter()
+        trace.spans.append(Span(kind=kind, name=" ".join(name.split())[:200], start=started, duration=finished - started))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests sent with the PROFILING_HEADER header or sampled with PROFILING_SAMPLE_RATE.
+
+    The trace of a profiled request contains GitHub and DB spans and, if no other request is being profiled
+    at the same time, a cProfile summary. Since requests share the event loop, the summary also includes the work
+    of concurrent requests. The slowest traces are available at /api/admin/profiles.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._header = settings.PROFILING_HEADER.lower().encode()
+
+    def _sampled(self, scope: Scope) -> bool:
+        if any(name == self._header for name, _ in scope["headers"]):
+            return True
+
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._sampled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(method=scope["method"], path=scope["path"])
+        token = _current_trace.set(trace)
+
+        profiler = cProfile.Profile() if _profiler_lock.acquire(blocking=False) else None
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _profiler_lock.release()
+
+            trace.duration = time.perf_counter() - started
+            for item in trace.spans:
+                item.start -= started
+
+            if profiler is not None:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(30)
+                trace.profile = stream.getvalue()
+
+            _current_trace.reset(token)
+            slowest_traces.add(trace)
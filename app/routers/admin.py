@@ -0,0 +1,36 @@
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Header
+from starlette import status
+from starlette.responses import JSONResponse
+
+from app.core import settings
+from app.core.profiling import slowest_traces
+
+admin_router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+
+@admin_router.get(
+    path="/profiles",
+    status_code=status.HTTP_200_OK,
+    summary="Get the slowest profiled requests",
+    description="Retrieve the slowest profiled requests with their GitHub and DB spans and cProfile summaries. "
+                "Profiling is enabled with PROFILING_ENABLED, the endpoint is served only if ADMIN_TOKEN is set.",
+    response_description="List of traces, the slowest first.",
+)
+async def get_profiles(x_admin_token: Annotated[str | None, Header()] = None):
+    """
+    Retrieve the slowest profiled requests.
+
+    :param x_admin_token: Token equal to ADMIN_TOKEN.
+    :return: List of traces, the slowest first.
+    """
+
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content="Invalid admin token")
+
+    return [trace.as_dict() for trace in slowest_traces.list()]
@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from starlette import status
+from starlette.responses import JSONResponse
+
+from app.services.repos import repos_service
+
+health_router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+
+@health_router.get(
+    path="/live",
+    status_code=status.HTTP_200_OK,
+    summary="Liveness probe",
+    description="Respond as soon as the application accepts requests.",
+)
+async def live():
+    """
+    Respond as soon as the application accepts requests.
+    """
+
+    return {"status": "alive"}
+
+
+@health_router.get(
+    path="/ready",
+    status_code=status.HTTP_200_OK,
+    summary="Readiness probe",
+    description="Respond with 200 once the top repositories are available, with 503 before that.",
+)
+async def ready():
+    """
+    Respond with 200 once the top repositories are available, with 503 before that.
+    """
+
+    if not await repos_service.is_data_ready():
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "starting"})
+
+    return {"status": "ready"}
@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from starlette import status
+
+from app.utils.metrics import metrics
+
+metrics_router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"]
+)
+
+
+@metrics_router.get(
+    path="",
+    status_code=status.HTTP_200_OK,
+    summary="Get service metrics",
+    description="Retrieve the current values of the in-process counters, gauges and histograms.",
+    response_description="Dictionary with counters, gauges and histogram percentiles.",
+)
+async def get_metrics():
+    """
+    Retrieve the current values of the in-process metrics.
+
+    :return: Dictionary with counters, gauges and histogram percentiles.
+    """
+
+    return metrics.snapshot()
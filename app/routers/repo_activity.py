@@ -1,9 +1,9 @@
 from datetime import date
 from typing import Annotated
 
-from fastapi import APIRouter, Query, Path
+from fastapi import APIRouter, Query, Path, Response
 from starlette import status
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
 from app.core.exceptions import DateRangeException, NoSuchRepository
 from app.schemas import repo_activity
@@ -15,6 +15,99 @@ repo_activity_router = APIRouter(
 )
 
 
+@repo_activity_router.post(
+    path="/activity:batch",
+    status_code=status.HTTP_200_OK,
+    response_model=list[repo_activity.RepoActivityBatch],
+    summary="Get activity of many repositories",
+    description="Retrieve the activity history of many repositories within a specified date range in one call. "
+                "Repositories that can't be found are omitted from the response.",
+    response_description="List of RepoActivityBatch objects in the order of the request.",
+)
+async def get_activity_batch(body: repo_activity.RepoActivityBatchRequest):
+    """
+    Retrieve the activity history of many repositories within a specified date range.
+
+    :param body: Full names of the repositories and the date range.
+    :return: List of RepoActivityBatch objects representing the activity of each repository.
+    """
+
+    try:
+        return await repo_activity_service.get_repos_activity(
+            repos_list=body.repos,
+            since=body.since,
+            until=body.until
+        )
+    except DateRangeException:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content="The commit history is only available for the last year. Max date range is 1 year"
+        )
+
+
+@repo_activity_router.post(
+    path="/activity:summary",
+    status_code=status.HTTP_200_OK,
+    response_model=list[repo_activity.RepoActivitySummary],
+    summary="Get activity summaries of many repositories",
+    description="Retrieve total commits, unique authors and rolling commit sums per day of many repositories "
+                "within a specified date range. Repositories that can't be found are omitted from the response.",
+    response_description="List of RepoActivitySummary objects in the order of the request.",
+)
+async def get_activity_summary(body: repo_activity.RepoActivitySummaryRequest):
+    """
+    Retrieve activity summaries of many repositories within a specified date range.
+
+    :param body: Full names of the repositories, the date range and the rolling window.
+    :return: List of RepoActivitySummary objects representing the summary of each repository.
+    """
+
+    try:
+        return await repo_activity_service.get_repos_activity_summary(
+            repos_list=body.repos,
+            since=body.since,
+            until=body.until,
+            window=body.window
+        )
+    except DateRangeException:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content="The commit history is only available for the last year. Max date range is 1 year"
+        )
+
+
+@repo_activity_router.get(
+    path="/activity/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    summary="Export activity of many repositories",
+    description="Stream the stored activity of many repositories within a date range as NDJSON.",
+    response_description="NDJSON stream, one object with repo, date, commits and authors per line.",
+)
+async def export_activity(
+        repos: Annotated[list[str], Query(example=["jwasham/coding-interview-university"],
+                                          description="Full names of the repositories.")],
+        since: Annotated[date, Query(example="2024-01-01", description="Start date of the activity range.")],
+        until: Annotated[date, Query(example="2024-12-30", description="End date of the activity range.")],
+):
+    """
+    Stream the stored activity of many repositories within a date range as NDJSON.
+
+    :param repos: Full names of the repositories.
+    :param since: Start date of the activity range.
+    :param until: End date of the activity range.
+    :return: StreamingResponse with NDJSON content.
+    """
+
+    if until < since:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content="Start date is later than end date")
+
+    return StreamingResponse(
+        repo_activity_service.export_repo_activity(repos, since, until),
+        media_type="application/x-ndjson"
+    )
+
+
 @repo_activity_router.get(
     path="/{owner}/{repo:path}/activity",
     status_code=status.HTTP_200_OK,
@@ -24,28 +117,40 @@ repo_activity_router = APIRouter(
     response_description="List of RepoActivity objects representing the repository activity.",
 )
 async def get_activity(
+        response: Response,
         owner: Annotated[str, Path(example="jwasham")],
         repo: Annotated[str, Path(example="jwasham/coding-interview-university")],
         since: Annotated[date, Query(example="2024-01-01", description="Start date of the activity range.")],
         until: Annotated[date, Query(example="2024-12-30", description="End date of the activity range.")],
+        consistency: Annotated[
+            repo_activity.ActivityConsistency,
+            Query(description="With 'strong' consistency the activity is synced with GitHub before answering.")
+        ] = repo_activity.ActivityConsistency.eventual,
 ):
     """
     Retrieve the activity history of a repository within a specified date range.
 
+    The age of the returned data in seconds is passed in the X-Data-Age header.
+
+    :param response: Response to set the headers to.
     :param owner: Owner of the repository.
     :param repo: Name of the repository.
     :param since: Start date of the activity range.
     :param until: End date of the activity range.
+    :param consistency: Consistency of the read.
     :return: List of RepoActivity objects representing the repository activity.
     """
 
     try:
-        return await repo_activity_service.get_repo_activity(
+        activity, age = await repo_activity_service.get_repo_activity(
             owner=owner,
             repo=repo,
             since=since,
-            until=until
+            until=until,
+            consistency=consistency
         )
+        response.headers["X-Data-Age"] = str(int(age))
+        return activity
     except DateRangeException:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Query
 from starlette import status
 
 from app.schemas import repos
+from app.services.movers import movers_service
 from app.services.repos import repos_service
 
 repos_router = APIRouter(
@@ -31,3 +32,50 @@ async def get_top_repos(
     """
 
     return await repos_service.get_top_repos_by_stars(sort, sort_desc)
+
+
+@repos_router.get(
+    path="/movers",
+    status_code=status.HTTP_200_OK,
+    response_model=list[repos.RepositoryMover],
+    summary="Get top movers",
+    description="Retrieve the repositories that gained the most stars or ranks within a time window.",
+    response_description="List of RepositoryMover objects, the biggest gain first.",
+)
+async def get_movers(
+        window: repos.MoversWindow = Query(repos.MoversWindow.day, description="Time window of the changes."),
+        by: repos.MoversSort = Query(repos.MoversSort.stars, description="Sort by gained stars or gained ranks."),
+        limit: int = Query(10, ge=1, le=100, description="Maximum number of repositories."),
+):
+    """
+    Retrieve the repositories that gained the most stars or ranks within a time window.
+
+    :param window: Time window of the changes (default is 24h).
+    :param by: Sort by gained stars or gained ranks (default is stars).
+    :param limit: Maximum number of repositories (default is 10).
+    :return: List of RepositoryMover objects representing the top movers.
+    """
+
+    return await movers_service.get_movers(window, by, limit)
+
+
+@repos_router.get(
+    path="/stats",
+    status_code=status.HTTP_200_OK,
+    response_model=list[repos.RepositoryStats],
+    summary="Get repository statistics",
+    description="Retrieve star sums, repository counts and average forks of the tracked repositories "
+                "grouped by language or owner.",
+    response_description="List of RepositoryStats objects sorted by stars in descending order.",
+)
+async def get_stats(
+        group_by: repos.StatsGroupBy = Query(repos.StatsGroupBy.language, description="Grouping criteria."),
+):
+    """
+    Retrieve aggregates of the tracked repositories grouped by language or owner.
+
+    :param group_by: Grouping criteria (default is language).
+    :return: List of RepositoryStats objects representing the aggregates.
+    """
+
+    return await repos_service.get_stats(group_by)
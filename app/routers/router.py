@@ -1,5 +1,9 @@
 from fastapi import APIRouter
 
+from app.core import settings
+from app.routers.admin import admin_router
+from app.routers.health import health_router
+from app.routers.metrics import metrics_router
 from app.routers.repo_activity import repo_activity_router
 from app.routers.repos import repos_router
 
@@ -7,3 +11,9 @@ api_router = APIRouter(prefix="/api")
 
 api_router.include_router(repos_router)
 api_router.include_router(repo_activity_router)
+api_router.include_router(metrics_router)
+api_router.include_router(health_router)
+
+# Admin endpoints expose internals of the application, so they are served only if a token protects them
+if settings.ADMIN_TOKEN:
+    api_router.include_router(admin_router)
@@ -1 +1 @@
-from . import repos, repo_activity
+from . import repos, repo_activity, records, github
@@ -0,0 +1,62 @@
+"""
+Typed structs of the GitHub API payloads.
+
+Only the fields used by the parser are declared, all other fields of the payloads are skipped while decoding.
+"""
+
+import msgspec
+
+
+class Account(msgspec.Struct):
+    """
+    Owner of a repository or actor of an activity.
+    """
+
+    login: str
+
+
+class Repository(msgspec.Struct):
+    """
+    Repository returned by the repositories API.
+    """
+
+    full_name: str
+
+
+class SearchRepository(msgspec.Struct):
+    """
+    Item of the repositories search results.
+    """
+
+    full_name: str
+    owner: Account
+    forks: int
+    watchers: int
+    open_issues: int
+    stargazers_count: int
+    language: str | None = None
+
+
+class SearchRepositories(msgspec.Struct):
+    """
+    Repositories search results.
+    """
+
+    items: list[SearchRepository] = []
+
+
+class Activity(msgspec.Struct):
+    """
+    Item of the repository activity list.
+    """
+
+    timestamp: str
+    actor: Account | None = None
+
+
+class Error(msgspec.Struct):
+    """
+    Error response of the GitHub API.
+    """
+
+    message: str = ""
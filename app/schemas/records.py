@@ -0,0 +1,164 @@
+"""
+Lightweight row types used by the service and DB layers.
+
+Unlike the pydantic models of this package they aren't validated, so they are cheap to build straight from
+asyncpg records on every scheduler tick. Pydantic models are only used at the HTTP boundary.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Mapping
+
+
+@dataclass(slots=True)
+class RepositoryRecord:
+    """
+    Row of the repositories table.
+    """
+
+    repo: str
+    owner: str
+    position_cur: int | None = None
+    position_prev: int | None = None
+    stars: int | None = None
+    watchers: int | None = None
+    forks: int | None = None
+    open_issues: int | None = None
+    language: str | None = None
+    id: int | None = None
+
+    # Columns written by the service, in the order of the values returned by `values`
+    columns = ("repo", "owner", "position_cur", "position_prev", "stars", "watchers", "forks", "open_issues", "language")
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> "RepositoryRecord":
+        return cls(
+            repo=record["repo"],
+            owner=record["owner"],
+            position_cur=record["position_cur"],
+            position_prev=record["position_prev"],
+            stars=record["stars"],
+            watchers=record["watchers"],
+            forks=record["forks"],
+            open_issues=record["open_issues"],
+            language=record["language"],
+            id=record["id"],
+        )
+
+    def values(self) -> tuple:
+        return (
+            self.repo, self.owner, self.position_cur, self.position_prev, self.stars,
+            self.watchers, self.forks, self.open_issues, self.language
+        )
+
+
+@dataclass(slots=True)
+class RepoActivityRecord:
+    """
+    Row of the repository_activity table.
+    """
+
+    date: date
+    commits: int
+    authors: list[str]
+    repository_id: int
+
+    # Columns written by the service, in the order of the values returned by `values`
+    columns = ("date", "commits", "authors", "repository_id")
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> "RepoActivityRecord":
+        return cls(
+            date=record["date"],
+            commits=record["commits"],
+            authors=record["authors"],
+            repository_id=record["repository_id"],
+        )
+
+    def values(self) -> tuple:
+        return self.date, self.commits, self.authors, self.repository_id
+
+
+@dataclass(slots=True)
+class RepositoryMoverRecord:
+    """
+    Change of stars and rank of a repository within a time window. Positive rank delta means moving up.
+    """
+
+    repo: str
+    owner: str
+    stars: int
+    position_cur: int
+    stars_delta: int
+    rank_delta: int
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> "RepositoryMoverRecord":
+        return cls(
+            repo=record["repo"],
+            owner=record["owner"],
+            stars=record["stars"],
+            position_cur=record["position_cur"],
+            stars_delta=record["stars"] - record["base_stars"],
+            rank_delta=record["base_position"] - record["position_cur"],
+        )
+
+
+@dataclass(slots=True)
+class RepositoryStatsRecord:
+    """
+    Aggregates of the tracked repositories with the same language or owner.
+    """
+
+    key: str | None
+    repos: int = 0
+    stars: int = 0
+    forks: int = 0
+    avg_forks: float = 0.0
+
+    def add(self, repo: RepositoryRecord, sign: int = 1) -> None:
+        """
+        Adds a repository to the aggregates, or removes it with sign -1.
+        """
+
+        self.repos += sign
+        self.stars += sign * (repo.stars or 0)
+        self.forks += sign * (repo.forks or 0)
+        self.avg_forks = self.forks / self.repos if self.repos else 0.0
+
+
+@dataclass(slots=True)
+class ActivityCrawlRecord:
+    """
+    Checkpoint of an activity crawl of a repository: the URL of the next page, the oldest fetched timestamp and
+    the activity aggregated from the fetched pages by date.
+    """
+
+    repository_id: int
+    latest_date: date | None
+    cursor: str
+    oldest_at: datetime | None
+    aggregates: dict[date, tuple[int, set[str]]]
+
+    # Columns written by the service, in the order of the values returned by `values`
+    columns = ("repository_id", "latest_date", "cursor", "oldest_at", "aggregates")
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> "ActivityCrawlRecord":
+        return cls(
+            repository_id=record["repository_id"],
+            latest_date=record["latest_date"],
+            cursor=record["cursor"],
+            oldest_at=record["oldest_at"],
+            aggregates={
+                date.fromisoformat(key): (commits, set(authors))
+                for key, (commits, authors) in json.loads(record["aggregates"]).items()
+            },
+        )
+
+    def values(self) -> tuple:
+        return self.repository_id, self.latest_date, self.cursor, self.oldest_at, json.dumps({
+            key.isoformat(): (commits, list(authors))
+            for key, (commits, authors) in self.aggregates.items()
+        })
@@ -1,6 +1,16 @@
 from datetime import date
+from enum import Enum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+
+class ActivityConsistency(Enum):
+    """
+    Enum representing consistency options for reading repository activity.
+    """
+
+    eventual: str = "eventual"
+    strong: str = "strong"
 
 
 class _RepoActivityBase(BaseModel):
@@ -20,12 +30,39 @@ class RepoActivity(_RepoActivityBase):
     date: date
 
 
-class RepoActivityCU(BaseModel):
+class RepoActivityBatchRequest(BaseModel):
     """
-    Pydantic model for creating or updating repository activity data.
+    Pydantic model for requesting activity of many repositories in one call.
     """
 
-    commits: str
-    authors: str
-    date: str
-    repository_id: str
+    repos: list[str] = Field(min_length=1, max_length=100, examples=[["jwasham/coding-interview-university"]])
+    since: date
+    until: date
+
+
+class RepoActivityBatch(BaseModel):
+    """
+    Pydantic model representing the activity of a single repository within a batch response.
+    """
+
+    repo: str
+    activity: list[RepoActivity]
+
+
+class RepoActivitySummaryRequest(RepoActivityBatchRequest):
+    """
+    Pydantic model for requesting activity summaries of many repositories in one call.
+    """
+
+    window: int = Field(7, ge=1, le=365, description="Window of the rolling commit sums in days.")
+
+
+class RepoActivitySummary(BaseModel):
+    """
+    Pydantic model representing the activity summary of a single repository within a date range.
+    """
+
+    repo: str
+    commits: int
+    authors: int
+    rolling_commits: list[int]
@@ -19,6 +19,34 @@ class RepositorySort(Enum):
     owner: str = "owner"
 
 
+class MoversWindow(Enum):
+    """
+    Enum representing time windows of repository movers.
+    """
+
+    hour: str = "1h"
+    day: str = "24h"
+    week: str = "7d"
+
+
+class MoversSort(Enum):
+    """
+    Enum representing sorting options for repository movers.
+    """
+
+    stars: str = "stars"
+    rank: str = "rank"
+
+
+class StatsGroupBy(Enum):
+    """
+    Enum representing grouping options for repository statistics.
+    """
+
+    language: str = "language"
+    owner: str = "owner"
+
+
 class _RepositoryBase(BaseModel):
     """
     Base Pydantic model for repository data.
@@ -43,17 +71,26 @@ class Repository(_RepositoryBase):
     owner: str
 
 
-class RepositoryCU(BaseModel):
+class RepositoryMover(BaseModel):
     """
-    Pydantic model for creating or updating repository data.
+    Pydantic model representing the change of stars and rank of a repository within a time window.
     """
 
-    position_cur: str
-    position_prev: str
-    stars: str
-    watchers: str
-    forks: str
-    open_issues: str
-    language: str
     repo: str
     owner: str
+    stars: int
+    position_cur: int
+    stars_delta: int
+    rank_delta: int
+
+
+class RepositoryStats(BaseModel):
+    """
+    Pydantic model representing aggregates of the tracked repositories with the same language or owner.
+    """
+
+    key: str | None
+    repos: int
+    stars: int
+    forks: int
+    avg_forks: float
@@ -0,0 +1,113 @@
+from datetime import date
+
+from app.core import settings
+from app.schemas.records import ActivityCrawlRecord
+from app.services.base import BaseService
+from app.services.repos import RepositoriesService
+
+
+class ActivityCrawlsService(BaseService):
+    """
+    Service for storing checkpoints of activity crawls, so an interrupted crawl is resumed by the next sync
+    instead of fetching every page again.
+    """
+
+    table_name = "repository_activity_crawls"
+    columns = ActivityCrawlRecord.columns
+    # Checkpoints are read once per crawl and written every few pages, they aren't cached
+    cached = False
+    pool_size = (1, 4)
+    _initial_query = f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            repository_id INT PRIMARY KEY REFERENCES {RepositoriesService.table_name}(id),
+            latest_date DATE DEFAULT null,
+            cursor VARCHAR NOT NULL,
+            oldest_at TIMESTAMPTZ DEFAULT null,
+            aggregates JSONB NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """
+
+    def _select_query(self) -> str:
+        """
+        Generate SQL query to select a recent checkpoint of a crawl.
+
+        Parameters: $1 - repository ID, $2 - maximum age of the checkpoint in seconds.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT * FROM {self.table_name}
+            WHERE repository_id = $1 AND updated_at > now() - make_interval(secs => $2);
+        """
+
+    def _upsert_query(self) -> str:
+        """
+        Generate SQL query to store the checkpoint of a crawl.
+
+        Parameters: values of the checkpoint in the order of ActivityCrawlRecord.values.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            INSERT INTO {self.table_name} ({", ".join(self.columns)})
+            VALUES ($1, $2, $3, $4, $5::JSONB)
+            ON CONFLICT (repository_id) DO UPDATE SET
+                latest_date = EXCLUDED.latest_date,
+                cursor = EXCLUDED.cursor,
+                oldest_at = EXCLUDED.oldest_at,
+                aggregates = EXCLUDED.aggregates,
+                updated_at = now()
+        """
+
+    def _delete_query(self) -> str:
+        """
+        Generate SQL query to delete the checkpoint of a crawl.
+
+        Parameters: $1 - repository ID.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            DELETE FROM {self.table_name}
+            WHERE repository_id = $1;
+        """
+
+    async def get_checkpoint(self, repo_id: int, latest_date: date | None) -> ActivityCrawlRecord | None:
+        """
+        Get the checkpoint of an interrupted crawl of a repository.
+
+        :param repo_id: Repository ID.
+        :param latest_date: Latest stored date the crawl goes back to, checkpoints of other crawls are ignored.
+        :return: Checkpoint or None if there is no recent checkpoint of the same crawl.
+        """
+
+        items = await self.execute(self._select_query(), repo_id, float(settings.ACTIVITY_CHECKPOINT_TTL), fetch=True)
+        if not items or items[0]["latest_date"] != latest_date:
+            return
+
+        return ActivityCrawlRecord.from_record(items[0])
+
+    async def save_checkpoint(self, checkpoint: ActivityCrawlRecord) -> None:
+        """
+        Store the checkpoint of a crawl, replacing the previous one.
+
+        :param checkpoint: Checkpoint.
+        """
+
+        await self.execute(self._upsert_query(), *checkpoint.values())
+
+    async def delete_checkpoint(self, repo_id: int) -> None:
+        """
+        Delete the checkpoint of a finished crawl.
+
+        :param repo_id: Repository ID.
+        """
+
+        await self.execute(self._delete_query(), repo_id)
+
+
+activity_crawls_service = ActivityCrawlsService()
@@ -1,12 +1,18 @@
+import asyncio
+import os
+import time
 from abc import ABC
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 import asyncpg
-from asyncpg import Pool, Connection
-from pydantic import BaseModel
+from asyncpg import Pool, Connection, Record
 
 from app.core import settings
-from app.core.logging_config import logger
+from app.core.logging_config import logger, shorten
+from app.core.profiling import span
+from app.utils.cache import VersionedCache
+from app.utils.metrics import metrics
 
 
 class BaseService(ABC):
@@ -16,17 +22,40 @@ class BaseService(ABC):
 
     table_name: str = ...
     _initial_query: str = ...
-    schemaCU: BaseModel
+    columns: tuple[str, ...] = ...
+    # Services caching their reads listen for the data versions published by other workers, see `listen`
+    cached: bool = True
+    # Minimum and maximum number of connections of the pool
+    pool_size: tuple[int, int] = (10, 10)
 
     def __init__(self):
         self._pool: Pool | None = None
+        self._listener: Connection | None = None
+        self.cache = VersionedCache(settings.CACHE_MAX_SIZE)
 
     async def _create_pool(self) -> None:
         """
         Creates an asyncpg connection pool using the specified PostgreSQL URL.
         """
 
-        self._pool = await asyncpg.create_pool(dsn=str(settings.PSQL_URL))
+        min_size, max_size = self.pool_size
+        self._pool = await asyncpg.create_pool(dsn=str(settings.PSQL_URL), min_size=min_size, max_size=max_size)
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[Connection]:
+        """
+        Acquires a connection from the pool, recording the time spent waiting for it.
+
+        :return: Async context manager yielding the connection.
+        """
+
+        if self._pool is None:
+            await self._create_pool()
+
+        started = time.perf_counter()
+        async with self._pool.acquire() as conn:
+            metrics.observe("db_pool_wait", time.perf_counter() - started, table=self.table_name)
+            yield conn
 
     async def execute(self, query: str, *args, fetch: bool = False) -> Any:
         """
@@ -37,56 +66,130 @@ class BaseService(ABC):
         :param fetch: If True, fetch results; if False, execute without fetching results.
         :return: Result of the query execution.
         """
-        if self._pool is None:
-            await self._create_pool()
+        try:
+            async with self._acquire() as conn:
+                conn: Connection
+                async with conn.transaction():
+                    with span("db", query):
+                        if fetch:
+                            return await conn.fetch(query, *args)
+                        else:
+                            return await conn.execute(query, *args)
+        except Exception as e:
+            logger.error(f"Can't execute query:\n{shorten(query, settings.LOG_MAX_QUERY)}\n\nError: {e}")
+
+    async def execute_many(self, query: str, args: list[tuple]) -> bool:
+        """
+        Executes a SQL query for each set of arguments within a single transaction.
 
+        :param query: The SQL query to execute.
+        :param args: List of arguments to replace placeholders in the query.
+        :return: True if the query was executed, False otherwise.
+        """
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 conn: Connection
                 async with conn.transaction():
-                    if fetch:
-                        return await conn.fetch(query, *args)
-                    else:
-                        return await conn.execute(query, *args)
+                    with span("db", query):
+                        await conn.executemany(query, args)
+                    return True
         except Exception as e:
-            logger.error(f"Can't execute query:\n{query}\n\nError: {e}")
+            logger.error(f"Can't execute query:\n{shorten(query, settings.LOG_MAX_QUERY)}\n\nError: {e}")
 
-    async def close_connection(self) -> None:
-        await self._pool.close()
+        return False
 
-    async def create_table(self) -> None:
+    async def stream(self, query: str, *args, prefetch: int = 1000) -> AsyncIterator[Record]:
         """
-        Creates a table in the database using the initial query provided in the service.
+        Iterates over the query results using a server-side cursor, so only `prefetch` rows are held in memory.
+
+        :param query: The SQL query to execute.
+        :param args: Arguments to replace placeholders in the query.
+        :param prefetch: Number of rows fetched from the server per round-trip.
+        :return: Async iterator over the result rows.
         """
+        async with self._acquire() as conn:
+            conn: Connection
+            async with conn.transaction():
+                async for record in conn.cursor(query, *args, prefetch=prefetch):
+                    yield record
 
-        await self.execute(self._initial_query)
+    async def notify(self) -> None:
+        """
+        Publishes a new data version after a committed write, so that every worker drops its cached reads.
+        """
+
+        version = f"{os.getpid()}:{time.time_ns()}"
+        self.cache.invalidate(version)
+        await self.execute("SELECT pg_notify($1, $2)", self.table_name, version)
 
-    def _columns(self) -> str:
+    async def listen(self) -> None:
         """
-        Returns a comma-separated string of column names in the associated database table.
+        Opens a dedicated connection listening for data versions published by other workers and enables the cache.
         """
 
-        return ", ".join(self.schemaCU.model_fields.keys())
+        try:
+            self._listener = await asyncpg.connect(dsn=str(settings.PSQL_URL))
+            await self._listener.add_listener(self.table_name, self._on_notify)
+        except Exception as e:
+            logger.error(f"Can't listen to {self.table_name} notifications. Error: {e}")
+            self._schedule_listener_reconnect()
+            return
+
+        self._listener.add_termination_listener(self._on_listener_terminated)
+        self.cache.invalidate()
+        self.cache.enabled = True
 
-    def _insert_many_query(self, values: list[str], columns: str = None) -> str:
+    def _on_notify(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        """
+        Invalidates the cache when another worker publishes a new data version.
         """
-        Generates a SQL query for inserting multiple rows into the database table.
 
-        :param values: List of value strings for each row.
-        :param columns: Optional comma-separated string of column names.
-        :return: SQL query for the bulk insert operation.
+        if payload != self.cache.version:
+            self.cache.invalidate(payload)
+
+    def _on_listener_terminated(self, connection: Connection) -> None:
+        """
+        Disables the cache while notifications can't be received, since cached reads could become stale unnoticed.
         """
 
-        columns = columns or self._columns()
-        return f"INSERT INTO {self.table_name} ({columns}) VALUES {', '.join(values)}"
+        logger.warning(f"Lost connection listening to {self.table_name} notifications")
+        self._listener = None
+        self.cache.enabled = False
+        self.cache.invalidate()
+        self._schedule_listener_reconnect()
+
+    def _schedule_listener_reconnect(self) -> None:
+        async def reconnect():
+            await asyncio.sleep(settings.CACHE_LISTENER_RECONNECT_DELAY)
+            await self.listen()
+
+        asyncio.get_running_loop().create_task(reconnect())
+
+    async def close_connection(self) -> None:
+        if self._listener is not None:
+            self._listener.remove_termination_listener(self._on_listener_terminated)
+            await self._listener.close()
+            self._listener = None
+
+        self.cache.enabled = False
+        if self._pool is not None:
+            await self._pool.close()
+
+    async def create_table(self) -> None:
+        """
+        Creates a table in the database using the initial query provided in the service.
+        """
+
+        await self.execute(self._initial_query)
 
-    @staticmethod
-    def _format_data(data: BaseModel) -> str:
+    def _insert_query(self, columns: tuple[str, ...] = None) -> str:
         """
-        Formats data from a Pydantic model into a string suitable for a SQL query.
+        Generates a parametrized SQL query for inserting a row into the database table.
 
-        :param data: Pydantic model representing the data.
-        :return: Formatted string of data.
+        :param columns: Optional column names, all columns written by the service by default.
+        :return: SQL query with a placeholder for each column.
         """
 
-        return "({})".format(", ".join(data.model_dump().values()))
+        columns = columns or self.columns
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        return f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES ({placeholders})"
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from app.core import settings
+from app.core.logging_config import logger
+from app.schemas.records import RepositoryMoverRecord
+from app.schemas.repos import MoversSort, MoversWindow
+from app.services.base import BaseService
+from app.services.repos import RepositoriesService, repos_service
+
+
+class RepositoryMoversService(BaseService):
+    """
+    Service for tracking changes of stars and ranks of the top repositories.
+
+    Every refresh tick stores a snapshot of the repositories whose stars or rank changed, then precomputes the deltas
+    for each window, so reading the top movers only slices a sorted list. Reads never write: the deltas are computed
+    again, without a snapshot, once the repositories have changed, e.g. by the ticks of other workers or of YCF.
+    """
+
+    table_name = "repository_snapshots"
+    columns = ("repository_id", "taken_at", "stars", "position")
+    # The movers are kept in memory and follow the versions of the repositories, not of the snapshots
+    cached = False
+    pool_size = (1, 2)
+    windows = {
+        MoversWindow.hour: timedelta(hours=1),
+        MoversWindow.day: timedelta(days=1),
+        MoversWindow.week: timedelta(days=7),
+    }
+    _initial_query = f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            repository_id INT REFERENCES {RepositoriesService.table_name}(id) NOT NULL,
+            taken_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            stars INT NOT NULL,
+            position INT NOT NULL,
+            PRIMARY KEY (repository_id, taken_at)
+        );
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._movers: dict[tuple[MoversWindow, MoversSort], list[RepositoryMoverRecord]] = dict()
+        # Version of the repositories and the time the movers were computed at
+        self._movers_version: str | None = None
+        self._movers_updated_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _snapshot_query(self) -> str:
+        """
+        Generate SQL query to store snapshots of the repositories changed since their latest snapshot.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            INSERT INTO {self.table_name} (repository_id, stars, position)
+            SELECT R.id, R.stars, R.position_cur
+            FROM {RepositoriesService.table_name} AS R
+            LEFT JOIN LATERAL (
+                SELECT stars, position FROM {self.table_name} AS S
+                WHERE S.repository_id = R.id
+                ORDER BY taken_at DESC
+                LIMIT 1
+            ) AS L ON true
+            WHERE R.position_cur IS NOT null AND R.stars IS NOT null
+                AND (L.stars IS DISTINCT FROM R.stars OR L.position IS DISTINCT FROM R.position_cur);
+        """
+
+    def _prune_query(self) -> str:
+        """
+        Generate SQL query to delete snapshots not needed by any window.
+
+        The latest snapshot before the longest window is kept, since it's the baseline of that window.
+
+        Parameters: $1 - longest window.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            DELETE FROM {self.table_name} AS S
+            WHERE S.taken_at < now() - $1::INTERVAL AND EXISTS (
+                SELECT 1 FROM {self.table_name} AS N
+                WHERE N.repository_id = S.repository_id AND N.taken_at > S.taken_at
+                    AND N.taken_at <= now() - $1::INTERVAL
+            );
+        """
+
+    def _deltas_query(self) -> str:
+        """
+        Generate SQL query to compute changes of the tracked repositories within a window.
+
+        The baseline is the latest snapshot taken before the window or, for a shorter history, the earliest one.
+
+        Parameters: $1 - window.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT R.repo, R.owner, R.stars, R.position_cur,
+                COALESCE(B.stars, E.stars, R.stars) AS base_stars,
+                COALESCE(B.position, E.position, R.position_cur) AS base_position
+            FROM {RepositoriesService.table_name} AS R
+            LEFT JOIN LATERAL (
+                SELECT stars, position FROM {self.table_name} AS S
+                WHERE S.repository_id = R.id AND S.taken_at <= now() - $1::INTERVAL
+                ORDER BY taken_at DESC
+                LIMIT 1
+            ) AS B ON true
+            LEFT JOIN LATERAL (
+                SELECT stars, position FROM {self.table_name} AS S
+                WHERE S.repository_id = R.id
+                ORDER BY taken_at
+                LIMIT 1
+            ) AS E ON true
+            WHERE R.position_cur IS NOT null AND R.stars IS NOT null;
+        """
+
+    async def update_movers(self) -> None:
+        """
+        Store snapshots of the changed repositories and precompute the movers of every window.
+        Called by the refresh tick after the top repositories are updated.
+        """
+
+        await self.execute(self._snapshot_query())
+        await self.execute(self._prune_query(), max(self.windows.values()))
+        async with self._lock:
+            await self._compute_movers()
+
+    async def _compute_movers(self) -> None:
+        """
+        Precompute the movers of every window from the stored snapshots.
+        """
+
+        version = repos_service.cache.version
+        movers = dict()
+        for window, interval in self.windows.items():
+            if (rows := await self.execute(self._deltas_query(), interval, fetch=True)) is None:
+                return
+
+            deltas = [RepositoryMoverRecord.from_record(row) for row in rows]
+            movers[(window, MoversSort.stars)] = sorted(deltas, key=lambda r: (-r.stars_delta, r.position_cur))
+            movers[(window, MoversSort.rank)] = sorted(deltas, key=lambda r: (-r.rank_delta, r.position_cur))
+
+        self._movers = movers
+        self._movers_version = version
+        self._movers_updated_at = time.monotonic()
+        logger.info("Computed repository movers")
+
+    def _movers_stale(self) -> bool:
+        """
+        Check if the movers must be computed again: the repositories have changed since they were computed,
+        or they are older than MOVERS_MAX_AGE seconds, since changes aren't noticed without the cache listener.
+
+        :return: True if the movers are stale.
+        """
+
+        return (
+            not self._movers
+            or self._movers_version != repos_service.cache.version
+            or time.monotonic() - self._movers_updated_at > settings.MOVERS_MAX_AGE
+        )
+
+    async def get_movers(self, window: MoversWindow, by: MoversSort, limit: int) -> list[RepositoryMoverRecord]:
+        """
+        Get the repositories that gained the most stars or ranks within a window.
+
+        :param window: Time window.
+        :param by: Sorting criteria: gained stars or gained ranks.
+        :param limit: Maximum number of repositories to retrieve.
+        :return: List of movers.
+        """
+
+        if self._movers_stale():
+            async with self._lock:
+                if self._movers_stale():
+                    await self._compute_movers()
+
+        return self._movers.get((window, by), list())[:limit]
+
+
+movers_service = RepositoryMoversService()
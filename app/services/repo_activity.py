@@ -1,13 +1,29 @@
+import asyncio
+import json
 from collections import defaultdict
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from asyncpg import Connection
 
 from app.core import settings
-from app.core.exceptions import DateRangeException, NoSuchRepository
-from app.schemas import repo_activity, repos
+from app.core.exceptions import DateRangeException, NoSuchRepository, ServiceOverloaded
+from app.core.logging_config import logger
+from app.schemas import repo_activity
+from app.schemas.records import ActivityCrawlRecord, RepoActivityRecord, RepositoryRecord
+from app.services.activity_crawls import activity_crawls_service
 from app.services.base import BaseService
 from app.services.repos import RepositoriesService, repos_service
+from app.utils.admission import AdmissionController
+from app.utils.cache import TTLCache
+from app.utils.columnar import RepoActivityColumns, get_columnar_store
+# Imported as a module, since the executors import the application while a worker process starts
+from app.utils import executors
 from app.utils.ghp import github_parser
-from app.utils.ycf import send_request_to_yandex_cloud_function
+from app.utils.metrics import metrics
+from app.utils.write_behind import WriteBehindQueue
+
+_MISSING = object()
 
 
 class RepositoryActivityService(BaseService):
@@ -16,7 +32,7 @@ class RepositoryActivityService(BaseService):
     """
 
     table_name = "repository_activity"
-    schemaCU = repo_activity.RepoActivityCU
+    columns = RepoActivityRecord.columns
     _initial_query = f"""
         CREATE TABLE IF NOT EXISTS {table_name} (
             id SERIAL PRIMARY KEY,
@@ -29,33 +45,132 @@ class RepositoryActivityService(BaseService):
         CREATE INDEX IF NOT EXISTS idx_{table_name}_date ON {table_name} (repository_id);
     """
 
-    def _select_in_date_range_query(self, repo_id: int, since: date, until: date) -> str:
+    def __init__(self):
+        super().__init__()
+        self._refreshing: dict[int, asyncio.Task] = dict()
+        # Negative caches of repositories that don't exist on GitHub and of repositories without any activity
+        self._missing = TTLCache(settings.NEGATIVE_CACHE_TTL, settings.NEGATIVE_CACHE_MAX_SIZE)
+        self._empty = TTLCache(settings.NEGATIVE_CACHE_TTL, settings.NEGATIVE_CACHE_MAX_SIZE)
+        # Activity fetched by syncs is written in batches in the background
+        self._writes = WriteBehindQueue(
+            name=self.table_name,
+            flush=self._write_activities,
+            max_size=settings.ACTIVITY_WRITE_BATCH_SIZE,
+            max_delay=settings.ACTIVITY_WRITE_DELAY,
+            max_retries=settings.ACTIVITY_WRITE_RETRIES
+        )
+        # Sync time of repositories with activity that isn't written yet, they're marked as synced once it's written
+        self._unwritten_syncs: dict[int, datetime] = dict()
+        # Limit syncs with GitHub, reads of the stored activity are not limited. Background refreshes have their own
+        # limit, so they can't fill the queue of the syncs requests wait for
+        self._admission = AdmissionController(
+            name="activity_sync",
+            limit=settings.ACTIVITY_COLD_SYNC_CONCURRENCY,
+            max_queue=settings.ACTIVITY_COLD_SYNC_QUEUE,
+            retry_after=settings.ACTIVITY_RETRY_AFTER
+        )
+        self._refresh_admission = AdmissionController(
+            name="activity_refresh",
+            limit=settings.ACTIVITY_REFRESH_CONCURRENCY,
+            max_queue=settings.ACTIVITY_REFRESH_QUEUE,
+            retry_after=settings.ACTIVITY_RETRY_AFTER
+        )
+        # Optional columnar store of the activity, None if it's disabled or NumPy isn't installed
+        self._columnar = get_columnar_store(settings.ACTIVITY_COLUMNAR_ENABLED, settings.ACTIVITY_COLUMNAR_MAX_REPOS)
+        # Oldest date written by this worker since the columns of a repository were read, and the number of versions
+        # published by other workers, since their writes can change any date
+        self._columns_written_since: dict[int, date] = dict()
+        self._foreign_versions = 0
+
+    def _select_in_date_range_query(self) -> str:
         """
         Generate SQL query to select repository activities in a given date range.
 
-        :param repo_id: Repository ID.
-        :param since: Start date.
-        :param until: End date.
+        Parameters: $1 - repository ID, $2 - start date, $3 - end date.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT * FROM {self.table_name}
+            WHERE repository_id = $1 AND date >= $2 AND date <= $3;
+        """
+
+    def _select_since_query(self) -> str:
+        """
+        Generate SQL query to select repository activities since a given date.
+
+        Parameters: $1 - repository ID, $2 - start date.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT * FROM {self.table_name}
+            WHERE repository_id = $1 AND date >= $2;
+        """
+
+    def _select_many_in_date_range_query(self) -> str:
+        """
+        Generate SQL query to select activities of many repositories in a given date range.
+
+        Parameters: $1 - list of repository IDs, $2 - start date, $3 - end date.
+
         :return: SQL query.
         """
 
         return f"""
             SELECT * FROM {self.table_name}
-            WHERE date >= '{since}' AND date <= '{until}' AND repository_id = {repo_id};
+            WHERE repository_id = ANY($1::INT[]) AND date >= $2 AND date <= $3
+            ORDER BY date;
         """
 
-    def _latest_date_query(self, repo_id: int) -> int:
+    def _upsert_query(self) -> str:
+        """
+        Generate SQL query to insert repository activity for a date or merge it into the stored one.
+
+        Parameters: values of the activity in the order of RepoActivityRecord.values.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            {self._insert_query()}
+            ON CONFLICT (date, repository_id) DO UPDATE SET
+                commits = GREATEST({self.table_name}.commits, EXCLUDED.commits),
+                authors = ARRAY(SELECT DISTINCT unnest({self.table_name}.authors || EXCLUDED.authors))
+        """
+
+    def _latest_date_query(self) -> str:
         """
         Generate SQL query to get the latest date for a repository.
 
-        :param repo_id: Repository ID.
+        Parameters: $1 - repository ID.
+
         :return: SQL query.
         """
 
         return f"""
             SELECT MAX(date)
             FROM {self.table_name}
-            WHERE repository_id = {repo_id};
+            WHERE repository_id = $1;
+        """
+
+    def _export_query(self) -> str:
+        """
+        Generate SQL query to select activities of many repositories in a date range.
+
+        Parameters: $1 - list of repository full names, $2 - start date, $3 - end date.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT R.repo, A.date, A.commits, A.authors
+            FROM {self.table_name} AS A
+            JOIN {RepositoriesService.table_name} AS R ON R.id = A.repository_id
+            WHERE R.repo = ANY($1::VARCHAR[]) AND A.date >= $2 AND A.date <= $3
+            ORDER BY R.repo, A.date;
         """
 
     @staticmethod
@@ -78,86 +193,386 @@ class RepositoryActivityService(BaseService):
         return True
 
     @staticmethod
-    def _prepare_before_pushing(
+    def _parse_timestamp(timestamp: str) -> datetime:
+        """
+        Converts the timestamp from the GitHub API response to a datetime object.
+
+        :param timestamp: Timestamp in format "%Y-%m-%dT%H:%M:%SZ".
+        :return: Timezone-aware datetime.
+        """
+
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+    async def _prepare_before_pushing(
+            self,
             owner: str,
             repo: str,
             repo_id: int,
             latest_date: date | None
-    ) -> list[repo_activity.RepoActivityCU]:
+    ) -> list[RepoActivityRecord]:
         """
         Prepare repository activity data before pushing to the database.
 
+        Pages of activity are fetched one by one, the crawl is checkpointed every ACTIVITY_CHECKPOINT_PAGES pages
+        and when it's interrupted, so the next sync continues from the last fetched page.
+
         :param owner: Owner of the repository.
         :param repo: Repository name.
         :param repo_id: Repository ID.
         :param latest_date: Latest date for the repository.
+        :raises GitHubUnavailable: If GitHub keeps failing.
+        :raises ValueError: If the fetch executor returns a malformed page.
         :return: List of prepared repository activities.
         """
         repo_name = repo.split("/")[-1]
 
-        repo_activities = defaultdict(lambda: {"commits": 0, "authors": set()})
-        data = send_request_to_yandex_cloud_function(
-            data={
-                     "owner": owner,
-                     "repo_name": repo_name,
-                 } | ({"latest_date": str(latest_date)} if latest_date else {}),
-            params={
-                "action": "parse_activity"
-            }
-        ) if settings.YCF_URL else github_parser.parse_activity(repo_name, owner, latest_date)
+        checkpoint = await activity_crawls_service.get_checkpoint(repo_id, latest_date)
+        if checkpoint is not None:
+            metrics.inc("activity_crawls_resumed")
+        else:
+            checkpoint = ActivityCrawlRecord(
+                repository_id=repo_id, latest_date=latest_date, cursor="", oldest_at=None, aggregates=dict()
+            )
 
-        for _date, author in data:
-            key = str(github_parser.convert_date(_date))
-            repo_activities[key]["commits"] += 1
-            repo_activities[key]["authors"].add(author)
+        pages = 0
+        try:
+            while True:
+                page = await executors.fetch_executor.run(
+                    "parse_activity_page", owner=owner, repo_name=repo_name, url=checkpoint.cursor or None
+                )
+                if not isinstance(page, dict):
+                    # Failures are raised by the executors, anything else means the worker lacks the action
+                    raise ValueError(f"Unexpected result of parse_activity_page: {type(page).__name__}")
+
+                items, next_url = page["items"], page["next_url"]
+                if not items or latest_date and github_parser.convert_date(items[0][0]) <= latest_date:
+                    break
+
+                for timestamp, author in items:
+                    key = github_parser.convert_date(timestamp)
+                    commits, authors = checkpoint.aggregates.get(key, (0, set()))
+                    authors.add(author)
+                    checkpoint.aggregates[key] = (commits + 1, authors)
+                checkpoint.oldest_at = self._parse_timestamp(items[-1][0])
+
+                if next_url is None:
+                    break
+
+                checkpoint.cursor = next_url
+                if (pages := pages + 1) % settings.ACTIVITY_CHECKPOINT_PAGES == 0:
+                    await activity_crawls_service.save_checkpoint(checkpoint)
+        except (Exception, asyncio.CancelledError):
+            if checkpoint.cursor:
+                await activity_crawls_service.save_checkpoint(checkpoint)
+            raise
+
+        if checkpoint.cursor:
+            await activity_crawls_service.delete_checkpoint(repo_id)
 
         return [
-            repo_activity.RepoActivityCU(
-                date=f"'{_date}'",
-                commits="'{}'".format(data.get("commits")),
-                authors="ARRAY['{}']".format("', '".join(data["authors"])),
-                repository_id=f"'{repo_id}'"
+            RepoActivityRecord(
+                date=_date,
+                commits=commits,
+                authors=list(authors),
+                repository_id=repo_id
             )
-            for _date, data in repo_activities.items()
+            for _date, (commits, authors) in checkpoint.aggregates.items()
         ]
 
-    async def _update_repository_activity(self, repo: str, owner: str, until: date) -> repos.Repository:
+    async def _latest_date(self, repo_id: int) -> date | None:
+        """
+        Get the latest date of the stored activity for a repository.
+
+        :param repo_id: Repository ID.
+        :return: Latest date or None if there is no activity yet.
+        """
+
+        key = ("latest_date", repo_id)
+        if (latest_date := self.cache.get(key)) is None:
+            version = self.cache.version
+            latest_date = (await self.execute(self._latest_date_query(), repo_id, fetch=True))[0][0]
+            if latest_date is not None:
+                self.cache.set(key, latest_date, version)
+
+        pending_dates = [item.date for item in self._writes.pending() if item.repository_id == repo_id]
+        return max(pending_dates + ([latest_date] if latest_date else []), default=None)
+
+    def _with_pending(
+            self,
+            activities: list[RepoActivityRecord],
+            repo_id: int,
+            since: date,
+            until: date
+    ) -> list[RepoActivityRecord]:
+        """
+        Merge the activity that isn't written to the database yet into the stored activity of a repository.
+
+        :param activities: Stored activity.
+        :param repo_id: Repository ID.
+        :param since: Start date.
+        :param until: End date.
+        :return: List of repository activities.
+        """
+
+        pending = [
+            item
+            for item in self._writes.pending()
+            if item.repository_id == repo_id and since <= item.date <= until
+        ]
+        if not pending:
+            return activities
+
+        merged = {item.date: item for item in activities}
+        for item in pending:
+            if (stored := merged.get(item.date, None)) is not None:
+                # The same merge as in the upsert query
+                item = RepoActivityRecord(
+                    date=item.date,
+                    commits=max(stored.commits, item.commits),
+                    authors=list(set(stored.authors) | set(item.authors)),
+                    repository_id=repo_id
+                )
+            merged[item.date] = item
+
+        return sorted(merged.values(), key=lambda item: item.date)
+
+    async def _columns(self, repo_id: int) -> RepoActivityColumns:
+        """
+        Get the columnar activity of a repository, loading it lazily.
+
+        Once the activity has been changed by this worker, only the last ACTIVITY_COLUMNAR_REFRESH_DAYS stored days,
+        the newer ones and the ones written since are read again. Columns read before a write of another worker,
+        or while its writes can't be noticed, are read in full.
+
+        :param repo_id: Repository ID.
+        :return: Columns of the repository.
+        """
+
+        version = (self.cache.version, self._foreign_versions)
+        columns = self._columnar.get(repo_id)
+        if columns is not None and self.cache.enabled and columns.version == version:
+            return columns
+
+        since = datetime.today().date() - timedelta(days=366)
+        written_since = self._columns_written_since.pop(repo_id, None)
+        if columns is not None and len(columns.commits) and self.cache.enabled \
+                and columns.version[1] == self._foreign_versions:
+            refresh_since = columns.end - timedelta(days=settings.ACTIVITY_COLUMNAR_REFRESH_DAYS)
+            since = max(since, min(refresh_since, written_since or refresh_since))
+
+        if (rows := await self.execute(self._select_since_query(), repo_id, since, fetch=True)) is None:
+            # Keeps the stored days, they're read in full on the next call
+            return self._columnar.merge(repo_id, list(), (None, -1))
+        return self._columnar.merge(repo_id, [RepoActivityRecord.from_record(item) for item in rows], version)
+
+    def _on_notify(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        """
+        Invalidates the cache when another worker publishes a new data version, the columns read before
+        are read in full.
+        """
+
+        if payload != self.cache.version:
+            self._foreign_versions += 1
+        super()._on_notify(connection, pid, channel, payload)
+
+    async def _synced_at(self, repo_ids: list[int]) -> dict[int, datetime | None]:
+        """
+        Get the time the activity of repositories was synced with GitHub at.
+
+        The sync state is cached with the activity data, so it's invalidated by the versions published
+        by this service, not by every write to the repositories. Repositories with activity that isn't written yet
+        are synced at the time of their last sync.
+
+        :param repo_ids: Repository IDs.
+        :return: Sync time by repository ID, None for repositories never synced.
+        """
+
+        result, missing = dict(), list()
+        for repo_id in repo_ids:
+            if (cached := self.cache.get(("synced_at", repo_id), _MISSING)) is _MISSING:
+                missing.append(repo_id)
+            else:
+                result[repo_id] = cached
+
+        if missing:
+            version = self.cache.version
+            for repo_id, synced_at in (await repos_service.get_activity_synced_at(missing) or dict()).items():
+                self.cache.set(("synced_at", repo_id), synced_at, version)
+                result[repo_id] = synced_at
+
+        for repo_id in repo_ids:
+            if (unwritten := self._unwritten_syncs.get(repo_id, None)) is not None:
+                result[repo_id] = unwritten
+
+        return result
+
+    async def _mark_synced(self, repo_ids: list[int]) -> None:
+        """
+        Mark the activity of repositories as synced now and publish a new version of the activity data,
+        so every worker drops its cached sync state.
+
+        :param repo_ids: Repository IDs.
+        """
+
+        if await repos_service.mark_activity_synced(repo_ids):
+            await self.notify()
+
+    async def _update_repository_activity(self, repository: RepositoryRecord, until: date) -> None:
         """
         Update repository activity data.
 
         Important remark: for each repository, activity data is added once - in full,
-        then only if the date of the last update is not current
+        then only if the date of the last update is not current.
+        A repository with new activity is marked as synced once the activity is written.
+
+        :param repository: Repository to update.
+        :param until: End date for updating activity data.
+        """
+
+        if repository.id in self._empty:
+            metrics.inc("negative_cache_hits", kind="empty")
+            return
+
+        latest_date = await self._latest_date(repository.id)
+
+        if await self.add_repo_activity(
+            repository.owner, repository.repo, repository.id, latest_date if latest_date and latest_date <= until else None
+        ):
+            self._unwritten_syncs[repository.id] = datetime.now(timezone.utc)
+        else:
+            await self._mark_synced([repository.id])
+
+    async def _admitted_update_repository_activity(
+            self,
+            repository: RepositoryRecord,
+            until: date,
+            background: bool = False
+    ) -> None:
+        """
+        Update repository activity data once admitted by the sync limiter.
+
+        Top 100 repositories are admitted first. Background refreshes are admitted by a separate limiter.
+
+        :param repository: Repository to update.
+        :param until: End date for updating activity data.
+        :param background: True if nobody waits for the update.
+        :raises ServiceOverloaded: If too many syncs are waiting.
+        """
+
+        if background:
+            admission, priority = self._refresh_admission, 0
+        else:
+            admission, priority = self._admission, 0 if repository.position_cur is not None else 1
+
+        async with admission.admit(priority):
+            await self._update_repository_activity(repository, until)
+
+    def _refresh_in_background(self, repository: RepositoryRecord, until: date) -> None:
+        """
+        Update repository activity data in a background task, unless the update is already running.
+
+        :param repository: Repository to update.
+        :param until: End date for updating activity data.
+        """
+
+        if repository.id in self._refreshing:
+            return
+
+        def on_done(task: asyncio.Task) -> None:
+            self._refreshing.pop(repository.id, None)
+            # Skipped refreshes are counted by the limiter, the next read of stale activity retries them
+            if task.cancelled() or (error := task.exception()) is None or isinstance(error, ServiceOverloaded):
+                return
+
+            logger.error(f"Can't refresh activity of {repository.repo}. Error: {error}")
+
+        task = asyncio.create_task(self._admitted_update_repository_activity(repository, until, background=True))
+        task.add_done_callback(on_done)
+        self._refreshing[repository.id] = task
+
+    async def _get_repository(self, repo: str, owner: str) -> RepositoryRecord:
+        """
+        Get a repository, creating it if it exists on GitHub but isn't stored yet.
+
+        Repositories that don't exist on GitHub are cached for NEGATIVE_CACHE_TTL seconds,
+        so repeated requests for them neither insert rows nor call GitHub.
 
         :param repo: Repository name.
         :param owner: Owner of the repository.
-        :param until: End date for updating activity data.
         :raises NoSuchRepository: If the repository doesn't exist.
-        :return: Updated repository.
+        :return: Repository.
         """
 
+        if (repo, owner) in self._missing:
+            metrics.inc("negative_cache_hits", kind="missing")
+            raise NoSuchRepository
+
+        if (data := await repos_service.get_by_repo_and_owner(repo, owner)) is not None:
+            return data[0]
+
+        # None means the existence can't be checked, then the repository is created as before
+        if await executors.fetch_executor.run("repo_exists", owner=owner, repo_name=repo.split("/")[-1]) is False:
+            self._missing.set((repo, owner))
+            raise NoSuchRepository
+
         if (data := await repos_service.get_by_repo_and_owner(repo, owner, True)) is None:
             raise NoSuchRepository
 
-        repository, just_created = data
-        if just_created is None:
-            await self.add_repo_activity(owner, repo, repository.id)
-            return repository
+        return data[0]
+
+    async def _sync_repository(
+            self,
+            repo: str,
+            owner: str,
+            until: date,
+            consistency: repo_activity.ActivityConsistency = repo_activity.ActivityConsistency.eventual
+    ) -> tuple[RepositoryRecord, float]:
+        """
+        Make sure the stored activity of a repository satisfies the freshness policy.
 
-        latest_date_query = self._latest_date_query(repository.id)
-        latest_date = (await self.execute(latest_date_query, fetch=True))[0][0]
+        Activity that has never been synced, or any activity with strong consistency, is synced before returning.
+        Activity older than ACTIVITY_STALENESS seconds is served as is and refreshed in the background.
 
-        await self.add_repo_activity(
-            owner, repo, repository.id, latest_date if latest_date and latest_date <= until else None
-        )
-        return repository
+        :param repo: Repository name.
+        :param owner: Owner of the repository.
+        :param until: End date for updating activity data.
+        :param consistency: Consistency of the read.
+        :raises NoSuchRepository: If the repository doesn't exist.
+        :return: Tuple containing the repository and the age of its activity data in seconds.
+        """
+
+        repository = await self._get_repository(repo, owner)
+        synced_at = (await self._synced_at([repository.id])).get(repository.id, None)
+        if consistency == repo_activity.ActivityConsistency.strong or synced_at is None:
+            await self._admitted_update_repository_activity(repository, until)
+            return repository, 0.0
+
+        return repository, self._refresh_if_stale(repository, synced_at, until)
+
+    def _refresh_if_stale(self, repository: RepositoryRecord, synced_at: datetime, until: date) -> float:
+        """
+        Refresh the activity of a synced repository in the background if it's older than ACTIVITY_STALENESS seconds.
+
+        :param repository: Repository synced at least once.
+        :param synced_at: Time the activity of the repository was synced at.
+        :param until: End date for updating activity data.
+        :return: Age of the activity data in seconds.
+        """
+
+        age = (datetime.now(timezone.utc) - synced_at).total_seconds()
+        if age > settings.ACTIVITY_STALENESS:
+            self._refresh_in_background(repository, until)
+
+        return age
 
     async def get_repo_activity(
             self,
             owner: str,
             repo: str,
             since: date,
-            until: date
-    ) -> list[repo_activity.RepoActivity]:
+            until: date,
+            consistency: repo_activity.ActivityConsistency = repo_activity.ActivityConsistency.eventual
+    ) -> tuple[list[RepoActivityRecord], float]:
         """
         Get repository activity data in a given date range.
 
@@ -165,38 +580,273 @@ class RepositoryActivityService(BaseService):
         :param repo: Repository name.
         :param since: Start date.
         :param until: End date.
-        :return: List of repository activities.
+        :param consistency: Consistency of the read, strong consistency always syncs the activity with GitHub first.
+        :return: Tuple containing the list of repository activities and the age of the data in seconds.
         """
 
         if not self._date_range_is_valid(since, until):
+            return list(), 0.0
+
+        repository, age = await self._sync_repository(repo, owner, until, consistency)
+
+        key = ("range", repository.id, since, until)
+        if self._columnar is not None:
+            result = self._columnar.records(await self._columns(repository.id), repository.id, since, until)
+        elif (result := self.cache.get(key)) is None:
+            version = self.cache.version
+            rows = await self.execute(self._select_in_date_range_query(), repository.id, since, until, fetch=True)
+            result = [RepoActivityRecord.from_record(item) for item in rows or list()]
+            # A failed read isn't cached
+            if rows is not None:
+                self.cache.set(key, result, version)
+
+        return self._with_pending(result, repository.id, since, until), age
+
+    async def _sync_repositories(self, full_names: list[str], until: date) -> list[RepositoryRecord]:
+        """
+        Sync the activity of many repositories concurrently.
+
+        The stored repositories are read with one query. Only the repositories that aren't stored or have never been
+        synced are synced before returning, stale ones are refreshed in the background.
+
+        :param full_names: Full names of the repositories in format 'owner/repo'.
+        :param until: End date for updating activity data.
+        :return: List of repositories that exist, in the order of the names.
+        """
+
+        semaphore = asyncio.Semaphore(settings.ACTIVITY_SYNC_CONCURRENCY)
+
+        async def sync(full_name: str) -> RepositoryRecord | None:
+            async with semaphore:
+                try:
+                    repository, _ = await self._sync_repository(full_name, full_name.split("/")[0], until)
+                    return repository
+                except NoSuchRepository:
+                    return None
+
+        repositories = {
+            repository.repo: repository
+            for repository in await repos_service.get_by_full_names(full_names)
+        }
+        synced_at = await self._synced_at([repository.id for repository in repositories.values()])
+        to_sync = list()
+        for full_name in full_names:
+            repository = repositories.get(full_name, None)
+            if repository is None or synced_at.get(repository.id, None) is None:
+                to_sync.append(full_name)
+            else:
+                self._refresh_if_stale(repository, synced_at[repository.id], until)
+
+        repositories.update(zip(to_sync, await asyncio.gather(*[sync(name) for name in to_sync])))
+
+        return [
+            repository
+            for repository in (repositories[name] for name in full_names)
+            if repository is not None
+        ]
+
+    async def get_repos_activity(
+            self,
+            repos_list: list[str],
+            since: date,
+            until: date
+    ) -> list[dict]:
+        """
+        Get activity data of many repositories in a given date range.
+
+        Repositories without stored activity are synced concurrently, then all activities are read with one query.
+        Repositories that don't exist are omitted from the result.
+
+        :param repos_list: Full names of the repositories in format 'owner/repo'.
+        :param since: Start date.
+        :param until: End date.
+        :return: List of repositories with their activities in the order of the request.
+        """
+
+        full_names = [name for name in dict.fromkeys(repos_list) if "/" in name]
+        if not self._date_range_is_valid(since, until):
+            return list()
+
+        repositories = await self._sync_repositories(full_names, until)
+        if not repositories:
             return list()
 
-        repository = await self._update_repository_activity(repo, owner, until)
+        activities = defaultdict(list)
+        for item in await self.execute(
+                self._select_many_in_date_range_query(),
+                [repository.id for repository in repositories],
+                since,
+                until,
+                fetch=True
+        ) or list():
+            activities[item["repository_id"]].append(RepoActivityRecord.from_record(item))
 
-        query = self._select_in_date_range_query(repository.id, since, until)
         return [
-            repo_activity.RepoActivity(**item)
-            for item in await self.execute(query, fetch=True)
+            {"repo": repository.repo, "activity": self._with_pending(activities[repository.id], repository.id, since, until)}
+            for repository in repositories
         ]
 
-    async def add_repo_activity(self, owner: str, repo: str, repo_id: int, latest_date: date = None) -> None:
+    async def get_repos_activity_summary(
+            self,
+            repos_list: list[str],
+            since: date,
+            until: date,
+            window: int
+    ) -> list[dict]:
+        """
+        Get total commits, unique authors and rolling commit sums of many repositories in a given date range.
+
+        With the columnar store the summaries are computed with vectorized operations over all repositories at once.
+
+        :param repos_list: Full names of the repositories in format 'owner/repo'.
+        :param since: Start date.
+        :param until: End date.
+        :param window: Window of the rolling commit sums in days.
+        :return: List of repository summaries in the order of the request.
+        """
+
+        if self._columnar is None:
+            return [
+                self._summarize(item["repo"], item["activity"], since, until, window)
+                for item in await self.get_repos_activity(repos_list, since, until)
+            ]
+
+        full_names = [name for name in dict.fromkeys(repos_list) if "/" in name]
+        if not self._date_range_is_valid(since, until):
+            return list()
+
+        repositories = await self._sync_repositories(full_names, until)
+        columns = await asyncio.gather(*[self._columns(repository.id) for repository in repositories])
+
+        matrix = self._columnar.commits_matrix(columns, since, until)
+        totals = matrix.sum(axis=1)
+        rolling = self._columnar.rolling_sum(matrix, window)
+
+        # Repositories with activity that isn't written to the database yet are summarized from their rows
+        pending = {item.repository_id for item in self._writes.pending()}
+        return [
+            self._summarize(
+                repository.repo,
+                self._with_pending(
+                    self._columnar.records(columns[i], repository.id, since, until), repository.id, since, until
+                ),
+                since,
+                until,
+                window
+            ) if repository.id in pending else {
+                "repo": repository.repo,
+                "commits": int(totals[i]),
+                "authors": self._columnar.unique_count(columns[i].authors_between(since, until)),
+                "rolling_commits": rolling[i].tolist(),
+            }
+            for i, repository in enumerate(repositories)
+        ]
+
+    @staticmethod
+    def _summarize(repo: str, activities: list[RepoActivityRecord], since: date, until: date, window: int) -> dict:
+        """
+        Summarize activity rows of a repository without the columnar store.
+
+        :param repo: Repository name.
+        :param activities: Activity of the repository in the date range.
+        :param since: Start date.
+        :param until: End date.
+        :param window: Window of the rolling commit sums in days.
+        :return: Repository summary.
+        """
+
+        daily = [0] * ((until - since).days + 1)
+        authors = set()
+        for item in activities:
+            daily[(item.date - since).days] += item.commits
+            authors.update(item.authors)
+
+        rolling, total = list(), 0
+        for i, commits in enumerate(daily):
+            total += commits - (daily[i - window] if i >= window else 0)
+            rolling.append(total)
+
+        return {"repo": repo, "commits": sum(daily), "authors": len(authors), "rolling_commits": rolling}
+
+    async def _write_activities(self, activities: list[RepoActivityRecord]) -> bool:
+        """
+        Write a batch of repository activities to the database.
+
+        Repositories without activity left in the queue are marked as synced.
+
+        :param activities: Activities of any repositories.
+        :return: True if the batch was written, False otherwise.
+        """
+
+        if not await self.execute_many(self._upsert_query(), [item.values() for item in activities]):
+            return False
+
+        if self._columnar is not None:
+            for item in activities:
+                if self._columnar.get(item.repository_id) is not None:
+                    oldest = self._columns_written_since.get(item.repository_id, item.date)
+                    self._columns_written_since[item.repository_id] = min(oldest, item.date)
+
+        queued = {item.repository_id for item in self._writes.queued()}
+        synced = [repo_id for repo_id in {item.repository_id for item in activities} if repo_id not in queued]
+        for repo_id in synced:
+            self._unwritten_syncs.pop(repo_id, None)
+        if synced:
+            await repos_service.mark_activity_synced(synced)
+
+        await self.notify()
+        return True
+
+    async def drain(self) -> None:
+        """
+        Write all pending repository activities to the database.
+        """
+
+        await self._writes.drain()
+
+    async def add_repo_activity(self, owner: str, repo: str, repo_id: int, latest_date: date = None) -> bool:
         """
         Add repository activity data to the database.
 
+        The data is written in the background by the write-behind queue, until then it's merged into the reads.
+
         :param owner: Owner of the repository.
         :param repo: Repository name.
         :param repo_id: Repository ID.
         :param latest_date: Latest date for updating activity data.
+        :return: True if new activity was queued for writing, False if there is none.
         """
-        if repo_activities := self._prepare_before_pushing(owner, repo, repo_id, latest_date):
-            await self.execute(
-                self._insert_many_query(
-                    values=[
-                        self._format_data(item)
-                        for item in repo_activities
-                    ]
-                )
-            )
+        repo_activities = await self._prepare_before_pushing(owner, repo, repo_id, latest_date)
+        if not repo_activities:
+            # Failed crawls raise, so only a repository confirmed by GitHub to have no activity is cached
+            if latest_date is None:
+                self._empty.set(repo_id)
+            return False
+
+        self._writes.put(repo_activities)
+        return True
+
+    async def export_repo_activity(self, repos_list: list[str], since: date, until: date) -> AsyncIterator[bytes]:
+        """
+        Stream stored activity of many repositories as NDJSON, one line per repository and day.
+
+        Only data already stored in the database is exported, no GitHub requests are made.
+
+        :param repos_list: Full names of the repositories.
+        :param since: Start date.
+        :param until: End date.
+        :return: Async iterator over NDJSON lines.
+        """
+
+        async for item in self.stream(
+                self._export_query(), repos_list, since, until, prefetch=settings.EXPORT_PREFETCH
+        ):
+            yield json.dumps({
+                "repo": item["repo"],
+                "date": item["date"].isoformat(),
+                "commits": item["commits"],
+                "authors": item["authors"],
+            }).encode() + b"\n"
 
 
 repo_activity_service = RepositoryActivityService()
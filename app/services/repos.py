@@ -1,11 +1,15 @@
 import asyncio
+from datetime import datetime
+
+from asyncpg import Connection
 
 from app.core import settings
 from app.core.logging_config import logger
-from app.schemas import repos
-from app.schemas.repos import RepositorySort
+from app.schemas.records import RepositoryRecord, RepositoryStatsRecord
+from app.schemas.repos import RepositorySort, StatsGroupBy
 from app.services.base import BaseService
-from app.utils.ghp import github_parser
+# Imported as a module, since the executors import the application while a worker process starts
+from app.utils import executors
 
 
 class RepositoriesService(BaseService):
@@ -14,7 +18,7 @@ class RepositoriesService(BaseService):
     """
 
     table_name = "repositories"
-    schemaCU = repos.RepositoryCU
+    columns = RepositoryRecord.columns
 
     def __init__(self):
         super().__init__()
@@ -32,8 +36,14 @@ class RepositoriesService(BaseService):
                 language VARCHAR DEFAULT null,
                 UNIQUE (owner, repo)
             );
+            ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS activity_synced_at TIMESTAMPTZ DEFAULT null;
             CREATE INDEX IF NOT EXISTS idx_{self.table_name}_owner_repo ON {self.table_name} (owner, repo);
         """
+        # True once the top repositories are available for reading
+        self.data_ready: bool = False
+        # Aggregates of the tracked repositories, maintained by update_top_repos from the changed repositories.
+        # Kept only while the cache is enabled and dropped on writes of other workers, like the cached reads
+        self._stats: dict[StatsGroupBy, dict[str | None, RepositoryStatsRecord]] | None = None
 
     def _select_top_repos_query(
             self,
@@ -63,42 +73,109 @@ class RepositoriesService(BaseService):
             ORDER BY {order_by};
         """
 
-    def _select_query(self, repo: str, owner: str) -> str:
+    def _top_repos_exist_query(self) -> str:
+        """
+        Generate SQL query for checking if any top repository is stored.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT EXISTS (
+                SELECT 1 FROM {self.table_name}
+                WHERE position_cur IS NOT null AND stars IS NOT null
+            );
+        """
+
+    def _select_query(self) -> str:
         """
         Generate SQL query for selecting a repository by repo and owner.
 
-        :param repo: Repository name.
-        :param owner: Owner name.
+        Parameters: $1 - repository name, $2 - owner name.
+
         :return: SQL query.
         """
 
         return f"""
             SELECT * FROM {self.table_name}
-            WHERE repo = '{repo}' AND owner = '{owner}'
+            WHERE repo = $1 AND owner = $2
         """
 
-    def _update_query(self, repo: repos.RepositoryCU) -> str:
+    def _select_many_query(self) -> str:
+        """
+        Generate SQL query for selecting repositories by their full names.
+
+        Parameters: $1 - list of repository full names.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT * FROM {self.table_name}
+            WHERE repo = ANY($1::VARCHAR[])
+        """
+
+    def _update_query(self) -> str:
         """
         Generate an update query for a repository.
 
-        :param repo: Repository to be updated.
+        Parameters: values of the repository in the order of RepositoryRecord.values.
+
         :return: Update query.
         """
 
         return f"""
-            UPDATE {self.table_name} SET {(
-            ", ".join(
-                [
-                    f"{col} = {value}"
-                    for col, value in zip(repos.RepositoryCU.model_fields.keys(), repo.model_dump().values())
-                ]
-            )
+            UPDATE {self.table_name} SET {", ".join(
+            f"{col} = ${i}" for i, col in enumerate(self.columns[2:], start=3)
         )}
-            WHERE repo = {repo.repo} AND owner = {repo.owner}
+            WHERE repo = $1 AND owner = $2
+        """
+
+    def _upsert_query(self) -> str:
+        """
+        Generate SQL query for inserting a repository or updating the stored one with the same owner and name,
+        e.g. a repository stored by an activity request before it entered the top.
+
+        Parameters: values of the repository in the order of RepositoryRecord.values.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            {self._insert_query()}
+            ON CONFLICT (owner, repo) DO UPDATE SET {", ".join(f"{col} = EXCLUDED.{col}" for col in self.columns[2:])}
+        """
+
+    def _select_activity_synced_query(self) -> str:
+        """
+        Generate SQL query for selecting the time the activity of repositories was synced at.
+
+        Parameters: $1 - list of repository IDs.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            SELECT id, activity_synced_at FROM {self.table_name}
+            WHERE id = ANY($1::INT[])
+        """
+
+    def _mark_activity_synced_query(self) -> str:
+        """
+        Generate SQL query for marking the activity of repositories as synced now.
+
+        Parameters: $1 - list of repository IDs.
+
+        :return: SQL query.
+        """
+
+        return f"""
+            UPDATE {self.table_name} SET activity_synced_at = now()
+            WHERE id = ANY($1::INT[])
         """
 
     @staticmethod
-    def _prepare_before_pushing(repos_list: list[repos.Repository]) -> list[repos.RepositoryCU]:
+    def _prepare_before_pushing(repos_list: list[RepositoryRecord]) -> list[RepositoryRecord]:
         """
         Prepare repositories before pushing.
 
@@ -112,22 +189,22 @@ class RepositoriesService(BaseService):
         }
         sorted_repos = sorted(repos_dict.values(), key=lambda r: -r.stars)
         return [
-            repos.RepositoryCU(
-                repo=f"'{item.repo}'",
-                owner=f"'{item.owner}'",
-                forks=f"'{item.forks}'",
-                watchers=f"'{item.watchers}'",
-                open_issues=f"'{item.open_issues}'",
-                language="'{}'".format(item.language) if item.language else "null",
-                position_prev=f"'{item.position_cur}'" if item.position_cur else "null",
-                stars=f"'{item.stars}'",
-                position_cur=f"'{i + 1}'",
+            RepositoryRecord(
+                repo=item.repo,
+                owner=item.owner,
+                forks=item.forks,
+                watchers=item.watchers,
+                open_issues=item.open_issues,
+                language=item.language or None,
+                position_prev=item.position_cur or None,
+                stars=item.stars,
+                position_cur=i + 1,
             )
             for i, item in enumerate(sorted_repos)
         ]
 
     @staticmethod
-    def _repos_different(old_repo: repos.Repository, cur_repo: repos.RepositoryCU) -> bool:
+    def _repos_different(old_repo: RepositoryRecord, cur_repo: RepositoryRecord) -> bool:
         """
         Check if repositories are different.
 
@@ -136,28 +213,59 @@ class RepositoriesService(BaseService):
         :return: True if repositories are different, False otherwise.
         """
 
-        return not all(
-            (
-                old_repo.repo == cur_repo.repo.strip("'"),
-                old_repo.owner == cur_repo.owner.strip("'"),
-                old_repo.stars == int(cur_repo.stars.strip("'")),
-                old_repo.position_cur == int(cur_repo.position_cur.strip("'")),
-                old_repo.open_issues == int(cur_repo.open_issues.strip("'")),
-                old_repo.forks == int(cur_repo.forks.strip("'")),
-                old_repo.watchers == int(cur_repo.watchers.strip("'")),
-                (
-                        old_repo.language is None and cur_repo.language == "null" or
-                        old_repo.language == cur_repo.language.strip("'")
-                ),
-            )
+        return (
+            old_repo.repo, old_repo.owner, old_repo.stars, old_repo.position_cur,
+            old_repo.open_issues, old_repo.forks, old_repo.watchers, old_repo.language
+        ) != (
+            cur_repo.repo, cur_repo.owner, cur_repo.stars, cur_repo.position_cur,
+            cur_repo.open_issues, cur_repo.forks, cur_repo.watchers, cur_repo.language
         )
 
+    @staticmethod
+    def _build_stats(repos_list: list[RepositoryRecord]) -> dict[StatsGroupBy, dict[str | None, RepositoryStatsRecord]]:
+        """
+        Compute aggregates of repositories from scratch.
+
+        :param repos_list: List of tracked repositories.
+        :return: Aggregates by grouping option and key.
+        """
+
+        stats = {group_by: dict() for group_by in StatsGroupBy}
+        for repo in repos_list:
+            RepositoriesService._update_stats(stats, repo)
+
+        return stats
+
+    @staticmethod
+    def _update_stats(
+            stats: dict[StatsGroupBy, dict[str | None, RepositoryStatsRecord]],
+            repo: RepositoryRecord,
+            sign: int = 1
+    ) -> None:
+        """
+        Add a repository to the aggregates, or remove it with sign -1.
+
+        :param stats: Aggregates by grouping option and key.
+        :param repo: Repository.
+        :param sign: 1 to add the repository, -1 to remove it.
+        """
+
+        for group_by in StatsGroupBy:
+            group = stats[group_by]
+            key = getattr(repo, group_by.value)
+            if (item := group.get(key, None)) is None:
+                item = group[key] = RepositoryStatsRecord(key=key)
+
+            item.add(repo, sign)
+            if not item.repos:
+                del group[key]
+
     async def get_top_repos_by_stars(
             self,
             sort: RepositorySort = None,
             sort_desc: bool = True,
             limit: int | None = 100
-    ) -> list[repos.Repository]:
+    ) -> list[RepositoryRecord]:
         """
         Get the top repositories by stars.
 
@@ -167,69 +275,142 @@ class RepositoriesService(BaseService):
         :return: List of repositories.
         """
 
+        key = ("top", sort, sort_desc, limit)
+        if (cached := self.cache.get(key)) is not None:
+            return cached
+
+        version = self.cache.version
         query = self._select_top_repos_query(sort, sort_desc, limit)
 
-        return [
-            repos.Repository(**item)
+        result = [
+            RepositoryRecord.from_record(item)
             for item in await self.execute(query, fetch=True)
         ]
+        self.cache.set(key, result, version)
+        return result
+
+    async def is_data_ready(self) -> bool:
+        """
+        Check if the top repositories are available for reading.
+
+        Until they are, every check queries the database bypassing the cache, since the first top repositories
+        can be written by the scheduler of another worker or by the Yandex Cloud function.
+
+        :return: True if the top repositories are available.
+        """
+
+        if not self.data_ready:
+            items = await self.execute(self._top_repos_exist_query(), fetch=True)
+            self.data_ready = bool(items and items[0][0])
+
+        return self.data_ready
 
     async def init_top_repos_on_startup(self) -> None:
         """
         Initialize top repositories on startup.
         """
 
-        if settings.YCF_URL:
-            return
-
         old_repos = await self.get_top_repos_by_stars()
-        if old_repos:
+        if old_repos or settings.YCF_URL:
+            self.data_ready = bool(old_repos)
             return
 
-        current_repos = github_parser.parse_top_repos()
-
+        current_repos = [RepositoryRecord(**item) for item in await executors.fetch_executor.run("parse_top_repos")]
         repos_to_push = self._prepare_before_pushing(current_repos)
-        values = [self._format_data(repo) for repo in repos_to_push]
-        query = self._insert_many_query(values)
 
-        await self.execute(query)
+        if await self.execute_many(self._upsert_query(), [repo.values() for repo in repos_to_push]):
+            await self.notify()
+            self.data_ready = bool(repos_to_push)
 
     async def update_top_repos(self) -> None:
         """
         Update top repositories.
         """
 
+        # The diff applies only to the aggregates built before the writes, not to ones rebuilt from the new rows
+        stats = self._stats
         old_repos = await self.get_top_repos_by_stars(limit=None)
         old_repos_dict = {
             (repo.repo, repo.owner): repo
             for repo in old_repos
         }
-        current_repos = github_parser.parse_top_repos()
+        current_repos = [RepositoryRecord(**item) for item in await executors.fetch_executor.run("parse_top_repos")]
         repos_to_push = self._prepare_before_pushing(old_repos + current_repos)
 
-        tasks = list()
-        columns = self._columns()
-
+        to_insert, to_update, changed = list(), list(), list()
         for cur_repo in repos_to_push:
-            old_repo = old_repos_dict.get((cur_repo.repo.strip("'"), cur_repo.owner.strip("'")), None)
-            if old_repo:
-                query = self._update_query(cur_repo) if self._repos_different(old_repo, cur_repo) else None
+            old_repo = old_repos_dict.get((cur_repo.repo, cur_repo.owner), None)
+            if old_repo is None:
+                to_insert.append(cur_repo.values())
+            elif self._repos_different(old_repo, cur_repo):
+                to_update.append(cur_repo.values())
             else:
-                query = self._insert_many_query([self._format_data(cur_repo)], columns)
+                continue
 
-            if query:
-                tasks.append(self.execute(query))
+            changed.append((old_repo, cur_repo))
 
-        await asyncio.gather(*tasks)
+        tasks = [
+            self.execute_many(query, args)
+            for query, args in ((self._upsert_query(), to_insert), (self._update_query(), to_update))
+            if args
+        ]
+        written = True
+        if tasks:
+            written = all(await asyncio.gather(*tasks))
+            await self.notify()
+
+            if stats is not None and self._stats is stats and self.cache.enabled and written:
+                for old_repo, cur_repo in changed:
+                    if old_repo is not None:
+                        self._update_stats(stats, old_repo, -1)
+                    self._update_stats(stats, cur_repo)
+            else:
+                # Rebuilt from the database on the next read
+                self._stats = None
 
+        self.data_ready = self.data_ready or written and bool(repos_to_push)
         logger.info("Updated top repositories")
 
+    async def get_stats(self, group_by: StatsGroupBy) -> list[RepositoryStatsRecord]:
+        """
+        Get aggregates of the tracked repositories grouped by language or owner.
+
+        :param group_by: Grouping option.
+        :return: List of aggregates sorted by stars in descending order.
+        """
+
+        if (stats := self._stats) is None or not self.cache.enabled:
+            version = self.cache.version
+            stats = self._build_stats(await self.get_top_repos_by_stars(limit=None))
+            # Not kept if another worker has written the repositories meanwhile
+            if self.cache.enabled and version == self.cache.version:
+                self._stats = stats
+
+        return sorted(stats[group_by].values(), key=lambda item: -item.stars)
+
+    def _on_notify(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        """
+        Invalidates the cache and drops the aggregates when another worker publishes a new data version.
+        """
+
+        if payload != self.cache.version:
+            self._stats = None
+        super()._on_notify(connection, pid, channel, payload)
+
+    def _on_listener_terminated(self, connection: Connection) -> None:
+        """
+        Drops the aggregates with the cache, since writes of other workers can't be noticed.
+        """
+
+        self._stats = None
+        super()._on_listener_terminated(connection)
+
     async def get_by_repo_and_owner(
             self,
             repo: str,
             owner: str,
             create: bool = False
-    ) -> tuple[repos.Repository, bool] | None:
+    ) -> tuple[RepositoryRecord, bool] | None:
         """
         Get repository by repo and owner.
 
@@ -239,36 +420,76 @@ class RepositoriesService(BaseService):
         :return: Tuple containing the repository and a boolean indicating if it was created.
         """
 
-        query = self._select_query(repo, owner)
+        key = ("repo", repo, owner)
+        if (cached := self.cache.get(key)) is not None:
+            return cached, False
 
-        item = await self.execute(query, fetch=True)
+        version = self.cache.version
+        query = self._select_query()
+
+        item = await self.execute(query, repo, owner, fetch=True)
         if item:
-            return repos.Repository(**item[0]), False
+            repository = RepositoryRecord.from_record(item[0])
+            self.cache.set(key, repository, version)
+            return repository, False
 
         if not create:
             return
 
-        await self.execute(
-            self._insert_many_query(
-                values=[
-                    self._format_data(repos.RepositoryCU(
-                        position_cur="null",
-                        position_prev="null",
-                        stars="null",
-                        watchers="null",
-                        forks="null",
-                        open_issues="null",
-                        language="null",
-                        repo=f"'{repo}'",
-                        owner=f"'{owner}'",
-                    ))
-                ]
-            )
-        )
+        if await self.execute(self._insert_query(("repo", "owner")), repo, owner) is not None:
+            await self.notify()
 
-        item = await self.execute(query, fetch=True)
+        item = await self.execute(query, repo, owner, fetch=True)
         if item:
-            return repos.Repository(**item[0]), True
+            return RepositoryRecord.from_record(item[0]), True
+
+    async def get_by_full_names(self, full_names: list[str]) -> list[RepositoryRecord]:
+        """
+        Get the stored repositories with the given full names.
+
+        :param full_names: Full names of the repositories in format 'owner/repo'.
+        :return: List of the stored repositories, repositories that aren't stored are omitted.
+        """
+
+        key = ("repos", tuple(full_names))
+        if (cached := self.cache.get(key)) is not None:
+            return cached
+
+        version = self.cache.version
+        result = [
+            RepositoryRecord.from_record(item)
+            for item in await self.execute(self._select_many_query(), full_names, fetch=True) or list()
+        ]
+        self.cache.set(key, result, version)
+        return result
+
+    async def get_activity_synced_at(self, repo_ids: list[int]) -> dict[int, datetime | None] | None:
+        """
+        Get the time the activity of repositories was synced with GitHub at.
+
+        The sync state isn't cached by this service, it's cached by the activity service, which publishes
+        a new version of the activity data whenever the state changes (see mark_activity_synced).
+
+        :param repo_ids: Repository IDs.
+        :return: Sync time by repository ID, None for repositories never synced, or None if the query failed.
+        """
+
+        if (items := await self.execute(self._select_activity_synced_query(), repo_ids, fetch=True)) is None:
+            return
+
+        return {item["id"]: item["activity_synced_at"] for item in items}
+
+    async def mark_activity_synced(self, repo_ids: list[int]) -> bool:
+        """
+        Mark the activity of repositories as synced with GitHub now.
+
+        No new version of the repositories is published, since the cached repositories don't include the sync state.
+
+        :param repo_ids: Repository IDs.
+        :return: True if the repositories were marked, False otherwise.
+        """
+
+        return await self.execute(self._mark_activity_synced_query(), repo_ids) is not None
 
 
 repos_service = RepositoriesService()
@@ -0,0 +1,86 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.core.exceptions import ServiceOverloaded
+from app.utils.metrics import metrics
+
+
+class AdmissionController:
+    """
+    Limits the number of concurrently running operations. Operations above the limit wait in a bounded queue
+    ordered by priority (lower value first); when the queue is full, new operations are rejected immediately.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, retry_after: int):
+        self._name = name
+        self._limit = limit
+        self._max_queue = max_queue
+        self._retry_after = retry_after
+
+        self._active = 0
+        self._queued = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = list()
+        self._counter = itertools.count()
+
+    def _report(self) -> None:
+        metrics.set("admission_active", self._active, controller=self._name)
+        metrics.set("admission_queue_depth", self._queued, controller=self._name)
+
+    async def _acquire(self, priority: int) -> None:
+        if self._active < self._limit and not self._queued:
+            self._active += 1
+            return
+
+        if self._queued >= self._max_queue:
+            metrics.inc("admission_rejected", controller=self._name)
+            raise ServiceOverloaded(self._retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._queued += 1
+        self._report()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over right before the cancellation
+                self._release()
+            else:
+                future.cancel()
+                self._queued -= 1
+                self._report()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot over to the waiter, the number of active operations stays the same
+                self._queued -= 1
+                future.set_result(None)
+                self._report()
+                return
+
+        self._active -= 1
+        self._report()
+
+    @asynccontextmanager
+    async def admit(self, priority: int = 0) -> AsyncIterator[None]:
+        """
+        Waits for a free slot and holds it while the context is active.
+
+        :param priority: Priority of the operation, lower values are admitted first.
+        :raises ServiceOverloaded: If the wait queue is full.
+        """
+
+        await self._acquire(priority)
+        metrics.inc("admission_admitted", controller=self._name)
+        self._report()
+        try:
+            yield
+        finally:
+            self._release()
@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class VersionedCache:
+    """
+    In-process read cache whose entries are dropped whenever the version of the underlying data changes.
+
+    The version is a stamp published by the writer of the data (see BaseService.notify), so every
+    worker holding a cache for the same table invalidates it after each committed write.
+    The least recently used entries are evicted when the cache holds `max_size` entries.
+    """
+
+    def __init__(self, max_size: int):
+        self.enabled: bool = False
+        self.version: str | None = None
+        self._max_size = max_size
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for the key.
+
+        :param key: Cache key.
+        :param default: Value returned if the key is missing or the cache is disabled.
+        :return: Cached value or default.
+        """
+
+        if not self.enabled or key not in self._data:
+            return default
+
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: Hashable, value: Any, version: str | None) -> None:
+        """
+        Stores the value if the data version hasn't changed since the value was read.
+
+        :param key: Cache key.
+        :param value: Value to store.
+        :param version: Version of the cache observed before the value was read from the database.
+        """
+
+        if not self.enabled or version != self.version:
+            return
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, version: str | None = None) -> None:
+        """
+        Drops all entries and switches the cache to the new version.
+
+        :param version: New version stamp of the data.
+        """
+
+        self.version = version
+        self._data.clear()
+
+
+class TTLCache:
+    """
+    In-process cache whose entries expire after a fixed time. The oldest entries are evicted when the cache is full.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._data: dict[Hashable, tuple[float, Any]] = dict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for the key.
+
+        :param key: Cache key.
+        :param default: Value returned if the key is missing or expired.
+        :return: Cached value or default.
+        """
+
+        if (item := self._data.get(key, None)) is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: Hashable, value: Any = True) -> None:
+        """
+        Stores the value for the TTL of the cache.
+
+        :param key: Cache key.
+        :param value: Value to store.
+        """
+
+        self._data.pop(key, None)
+        if len(self._data) >= self._max_size:
+            # Dicts keep insertion order, so the first key is the oldest one
+            del self._data[next(iter(self._data))]
+
+        self._data[key] = (time.monotonic() + self._ttl, value)
+
+    def discard(self, key: Hashable) -> None:
+        self._data.pop(key, None)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from app.core.exceptions import GitHubUnavailable
+from app.core.logging_config import logger
+from app.utils.metrics import metrics
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that fails fast while a dependency is degraded.
+
+    After `failure_threshold` consecutive failures the circuit opens and every call is rejected for `reset_timeout`
+    seconds. Then a single trial call is allowed: its success closes the circuit, its failure opens it again,
+    and a trial released without an outcome allows the next one.
+    Thread-safe, since fetch actions run in worker threads.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            logger.warning(f"Circuit breaker {self._name} is {state}")
+        self._state = state
+        metrics.set("circuit_breaker_open", int(state != self.CLOSED), breaker=self._name)
+
+    def dump(self) -> tuple[str, int, float]:
+        """
+        Returns the state of the circuit, so it can be passed to another process on the same host.
+
+        :return: State, number of consecutive failures and the time the circuit was opened at.
+        """
+
+        with self._lock:
+            return self._state, self._failures, self._opened_at
+
+    def load(self, dumped: tuple[str, int, float]) -> None:
+        """
+        Applies the state of the circuit observed by another process, the latest observation wins.
+
+        :param dumped: State returned by `dump`.
+        """
+
+        state, failures, opened_at = dumped
+        with self._lock:
+            self._failures = failures
+            self._opened_at = opened_at
+            self._set_state(state)
+
+    def before_call(self) -> None:
+        """
+        Checks that a call is allowed.
+
+        :raises GitHubUnavailable: If the circuit is open, or a trial call is already running.
+        """
+
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            retry_after = self._opened_at + self._reset_timeout - time.monotonic()
+            if self._state == self.OPEN and retry_after <= 0:
+                self._set_state(self.HALF_OPEN)
+                return
+
+            metrics.inc("circuit_breaker_rejected", breaker=self._name)
+            raise GitHubUnavailable(max(int(retry_after) + 1, 1))
+
+    def record_success(self) -> None:
+        """
+        Records a successful call, closing the circuit.
+        """
+
+        with self._lock:
+            self._failures = 0
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """
+        Records a failed call, opening the circuit after too many consecutive failures or a failed trial call.
+        """
+
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def release(self) -> None:
+        """
+        Records a call that says nothing about the health of the dependency. A trial call is allowed again right away.
+        """
+
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._opened_at = time.monotonic() - self._reset_timeout
+                self._set_state(self.OPEN)
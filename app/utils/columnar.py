@@ -0,0 +1,293 @@
+"""
+Optional in-process columnar store of daily repository activity.
+
+NumPy is an optional dependency: the store is used only if ACTIVITY_COLUMNAR_ENABLED is set and NumPy is installed.
+"""
+
+from collections.abc import Hashable
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+
+from app.core.logging_config import logger
+from app.schemas.records import RepoActivityRecord
+from app.utils.metrics import metrics
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    import numpy
+
+
+class RepoActivityColumns:
+    """
+    Daily activity of a repository, indexed by the number of days since `start`.
+
+    Authors of the day `i` are `author_ids[author_offsets[i]:author_offsets[i + 1]]`, the IDs index `authors`.
+    """
+
+    __slots__ = ("start", "commits", "author_offsets", "author_ids", "authors", "version")
+
+    def __init__(
+            self,
+            start: date,
+            commits: "numpy.ndarray",
+            author_offsets: "numpy.ndarray",
+            author_ids: "numpy.ndarray",
+            authors: list[str],
+            version: Hashable
+    ):
+        self.start = start
+        self.commits = commits
+        self.author_offsets = author_offsets
+        self.author_ids = author_ids
+        # Author table the IDs were interned into, it's replaced by the store when it's compacted
+        self.authors = authors
+        # Version of the activity the columns were read at, set by the service
+        self.version = version
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=len(self.commits) - 1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.commits.nbytes + self.author_offsets.nbytes + self.author_ids.nbytes
+
+    def _bounds(self, since: date, until: date) -> tuple[int, int]:
+        """
+        Converts a date range to the bounds of a slice of the columns.
+
+        :param since: Start date.
+        :param until: End date.
+        :return: Start and stop indices, clipped to the stored days.
+        """
+
+        size = len(self.commits)
+        return (
+            min(max((since - self.start).days, 0), size),
+            min(max((until - self.start).days + 1, 0), size)
+        )
+
+    def commits_between(self, since: date, until: date) -> "numpy.ndarray":
+        """
+        Commits per day in a date range, zero for the days without stored activity.
+
+        :param since: Start date.
+        :param until: End date.
+        :return: Array with one item per day of the range.
+        """
+
+        result = np.zeros((until - since).days + 1, dtype=np.int64)
+        lo, hi = self._bounds(since, until)
+        if lo < hi:
+            shift = (self.start - since).days
+            result[lo + shift:hi + shift] = self.commits[lo:hi]
+
+        return result
+
+    def authors_between(self, since: date, until: date) -> "numpy.ndarray":
+        """
+        IDs of the authors active in a date range, with duplicates.
+
+        :param since: Start date.
+        :param until: End date.
+        :return: Array of author IDs.
+        """
+
+        lo, hi = self._bounds(since, until)
+        return self.author_ids[self.author_offsets[lo]:self.author_offsets[hi]]
+
+
+class ColumnarActivityStore:
+    """
+    In-process store of daily repository activity in NumPy arrays, so range slices, sums and rolling windows
+    over many repositories are vectorized operations instead of loops over rows.
+
+    Author logins are interned to integer IDs shared by all repositories. The least recently loaded repositories
+    are evicted when the store holds more than `max_repos` repositories, and the author table is rebuilt from
+    the stored repositories once it has doubled since the previous rebuild.
+    """
+
+    def __init__(self, max_repos: int):
+        self._max_repos = max_repos
+        self._repos: dict[int, RepoActivityColumns] = dict()
+        self._author_ids: dict[str, int] = dict()
+        self._authors: list[str] = list()
+        self._authors_at_compaction = 0
+
+    def get(self, repo_id: int) -> RepoActivityColumns | None:
+        return self._repos.get(repo_id, None)
+
+    def _author_id(self, author: str) -> int:
+        if (author_id := self._author_ids.get(author, None)) is None:
+            author_id = self._author_ids[author] = len(self._authors)
+            self._authors.append(author)
+
+        return author_id
+
+    def _compact_authors(self) -> None:
+        """
+        Rebuilds the author table with the authors of the stored repositories only.
+
+        The table is replaced, not changed in place, so columns handed out before keep their own consistent table.
+        """
+
+        live = np.unique(np.concatenate([columns.author_ids for columns in self._repos.values()])) if self._repos \
+            else np.zeros(0, dtype=np.int32)
+        authors = [self._authors[author_id] for author_id in live.tolist()]
+        remap = np.zeros(len(self._authors), dtype=np.int32)
+        remap[live] = np.arange(len(live), dtype=np.int32)
+
+        for repo_id, columns in self._repos.items():
+            self._repos[repo_id] = RepoActivityColumns(
+                columns.start,
+                columns.commits,
+                columns.author_offsets,
+                remap[columns.author_ids],
+                authors,
+                columns.version
+            )
+
+        self._authors = authors
+        self._author_ids = {author: author_id for author_id, author in enumerate(authors)}
+        self._authors_at_compaction = len(authors)
+
+    def merge(self, repo_id: int, rows: list[RepoActivityRecord], version: Hashable) -> RepoActivityColumns:
+        """
+        Replaces the stored days of a repository with the given rows, loading the repository if it isn't stored.
+
+        :param repo_id: Repository ID.
+        :param rows: Activity rows read from the database, they replace the stored days with the same dates.
+        :param version: Version of the activity cache the rows were read at.
+        :return: Updated columns of the repository.
+        """
+
+        days = dict()
+        if (columns := self._repos.pop(repo_id, None)) is not None:
+            for i in np.flatnonzero(columns.commits):
+                days[columns.start + timedelta(days=int(i))] = (
+                    int(columns.commits[i]),
+                    columns.author_ids[columns.author_offsets[i]:columns.author_offsets[i + 1]]
+                )
+
+        for row in rows:
+            days[row.date] = (row.commits, np.fromiter(map(self._author_id, row.authors), dtype=np.int32))
+
+        if days:
+            start = min(days)
+            dates = sorted(days)
+            index = np.fromiter(((day - start).days for day in dates), dtype=np.int64, count=len(dates))
+            size = int(index[-1]) + 1
+
+            commits = np.zeros(size, dtype=np.int32)
+            commits[index] = [days[day][0] for day in dates]
+
+            counts = np.zeros(size, dtype=np.int64)
+            counts[index] = [len(days[day][1]) for day in dates]
+            author_offsets = np.zeros(size + 1, dtype=np.int64)
+            np.cumsum(counts, out=author_offsets[1:])
+
+            author_ids = np.concatenate([days[day][1] for day in dates]).astype(np.int32, copy=False)
+        else:
+            start = date.today()
+            commits = np.zeros(0, dtype=np.int32)
+            author_offsets = np.zeros(1, dtype=np.int64)
+            author_ids = np.zeros(0, dtype=np.int32)
+
+        columns = self._repos[repo_id] = RepoActivityColumns(
+            start, commits, author_offsets, author_ids, self._authors, version
+        )
+        metrics.set("activity_columnar_bytes", columns.nbytes, repo=repo_id)
+
+        if len(self._repos) > self._max_repos:
+            # Dicts keep insertion order and merged repositories are reinserted, so the first one is the oldest
+            evicted = next(iter(self._repos))
+            del self._repos[evicted]
+            metrics.remove("activity_columnar_bytes", repo=evicted)
+
+            # Amortized, the table is rebuilt after at least as many new authors as it keeps
+            if len(self._authors) > 2 * max(self._authors_at_compaction, 1024):
+                self._compact_authors()
+                columns = self._repos.get(repo_id, columns)
+
+        metrics.set("activity_columnar_repos", len(self._repos))
+        metrics.set("activity_columnar_authors", len(self._authors))
+        return columns
+
+    def records(self, columns: RepoActivityColumns, repo_id: int, since: date, until: date) -> list[RepoActivityRecord]:
+        """
+        Activity rows of a repository in a date range.
+
+        :param columns: Columns of the repository.
+        :param repo_id: Repository ID.
+        :param since: Start date.
+        :param until: End date.
+        :return: List of repository activities ordered by date.
+        """
+
+        lo, hi = columns._bounds(since, until)
+        offsets = columns.author_offsets
+        return [
+            RepoActivityRecord(
+                date=columns.start + timedelta(days=int(i)),
+                commits=int(columns.commits[i]),
+                authors=[columns.authors[author_id] for author_id in columns.author_ids[offsets[i]:offsets[i + 1]]],
+                repository_id=repo_id
+            )
+            for i in np.flatnonzero(columns.commits[lo:hi]) + lo
+        ]
+
+    @staticmethod
+    def commits_matrix(columns: list[RepoActivityColumns], since: date, until: date) -> "numpy.ndarray":
+        """
+        Commits per day of many repositories in a date range.
+
+        :param columns: Columns of the repositories.
+        :param since: Start date.
+        :param until: End date.
+        :return: Array with one row per repository and one column per day of the range.
+        """
+
+        return np.stack([item.commits_between(since, until) for item in columns]) if columns \
+            else np.zeros((0, (until - since).days + 1), dtype=np.int64)
+
+    @staticmethod
+    def unique_count(ids: "numpy.ndarray") -> int:
+        return int(np.unique(ids).size)
+
+    @staticmethod
+    def rolling_sum(matrix: "numpy.ndarray", window: int) -> "numpy.ndarray":
+        """
+        Rolling sums over the last `window` days of every row of a matrix.
+
+        :param matrix: Array with one row per repository and one column per day.
+        :param window: Window size in days.
+        :return: Array of the same shape, the first days are summed over the available days.
+        """
+
+        cumsum = np.cumsum(matrix, axis=1)
+        result = cumsum.copy()
+        result[:, window:] -= cumsum[:, :-window]
+        return result
+
+
+def get_columnar_store(enabled: bool, max_repos: int) -> ColumnarActivityStore | None:
+    """
+    Creates the columnar activity store if it's enabled and NumPy is installed.
+
+    :param enabled: True if the store is enabled by the settings.
+    :param max_repos: Maximum number of stored repositories.
+    :return: ColumnarActivityStore instance or None.
+    """
+
+    if not enabled:
+        return
+
+    if np is None:
+        logger.warning("NumPy isn't installed, the columnar activity store is disabled")
+        return
+
+    return ColumnarActivityStore(max_repos)
@@ -0,0 +1,209 @@
+import asyncio
+import dataclasses
+import math
+from abc import ABC, abstractmethod
+from typing import Any, TYPE_CHECKING
+
+from app.core import settings
+from app.core.exceptions import GitHubUnavailable, RateLimitExceeded
+from app.core.logging_config import logger
+from app.utils.ghp import github_parser
+from app.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    import httpx
+
+
+def handle(action: str, payload: dict) -> Any:
+    """
+    Runs a fetch action and returns its JSON-compatible result.
+
+    This is the single code path shared by all executors and by the stand-in worker (app.worker).
+
+    :param action: Name of the action: 'parse_activity_page', 'parse_top_repos' or 'repo_exists'.
+    :param payload: Parameters of the action.
+    :raises ValueError: If the action is unknown.
+    :return: Result of the action.
+    """
+
+    if action == "parse_activity_page":
+        items, next_url = github_parser.parse_activity_page(payload["repo_name"], payload["owner"], payload.get("url"))
+        return {"items": items, "next_url": next_url}
+
+    if action == "parse_top_repos":
+        return [dataclasses.asdict(repo) for repo in github_parser.parse_top_repos()]
+
+    if action == "repo_exists":
+        return github_parser.repo_exists(payload["repo_name"], payload["owner"])
+
+    raise ValueError(f"Unknown action: {action}")
+
+
+def handle_in_worker(action: str, payload: dict, state: dict) -> tuple[Any, Exception | None, dict, dict]:
+    """
+    Runs a fetch action in a worker process of ProcessPoolFetchExecutor.
+
+    The worker starts from the token pool and circuit breaker state of the parent process and hands its state
+    and recorded metrics back, so token rotation, breaker state and fetch metrics are shared with the parent.
+
+    :param action: Name of the action.
+    :param payload: Parameters of the action.
+    :param state: State of the GitHub parser of the parent process.
+    :return: Result of the action (None if it failed), the raised exception, the state of the GitHub parser
+        and the metrics recorded by the action.
+    """
+
+    github_parser.load_state(state)
+    try:
+        result, error = handle(action, payload), None
+    except Exception as e:
+        result, error = None, e
+
+    return result, error, github_parser.dump_state(), metrics.drain()
+
+
+class FetchExecutor(ABC):
+    """
+    Abstract executor of fetch actions. Fetching never blocks the event loop, whichever executor is used.
+    """
+
+    @abstractmethod
+    async def run(self, action: str, **payload) -> Any:
+        """
+        Runs a fetch action.
+
+        :param action: Name of the action.
+        :param payload: JSON-compatible parameters of the action.
+        :raises RateLimitExceeded: If the GitHub rate limit is exceeded.
+        :raises GitHubUnavailable: If GitHub or the remote worker keeps failing.
+        :raises ValueError: If the action is unknown.
+        :return: JSON-compatible result of the action.
+        """
+
+    async def close(self) -> None:
+        """
+        Releases resources held by the executor.
+        """
+
+
+class InProcessExecutor(FetchExecutor):
+    """
+    Runs fetch actions in a thread of the current process.
+    """
+
+    async def run(self, action: str, **payload) -> Any:
+        return await asyncio.to_thread(handle, action, payload)
+
+
+class ProcessPoolFetchExecutor(FetchExecutor):
+    """
+    Runs fetch actions in a pool of local worker processes, so parsing doesn't compete with request handling for the GIL.
+    """
+
+    def __init__(self, max_workers: int):
+        self._max_workers = max_workers
+        self._pool: "ProcessPoolExecutor | None" = None
+
+    async def run(self, action: str, **payload) -> Any:
+        if self._pool is None:
+            # Imported on first use to keep importing the application cheap
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        result, error, state, recorded = await asyncio.get_running_loop().run_in_executor(
+            self._pool, handle_in_worker, action, payload, github_parser.dump_state()
+        )
+        github_parser.load_state(state)
+        metrics.merge(recorded)
+        if error is not None:
+            raise error
+
+        return result
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class RemoteExecutor(FetchExecutor):
+    """
+    Sends fetch actions to a remote HTTP worker: `POST <url>?action=<action>` with the payload as JSON body.
+    The worker answers with the JSON result, 429 if the GitHub rate limit is exceeded, 503 with Retry-After
+    if GitHub is unavailable and 400 for an unknown action.
+
+    Compatible with the Yandex Cloud function and with the stand-in worker (app.worker).
+    """
+
+    def __init__(self, url: str, timeout: float, retries: int):
+        self._url = url
+        self._timeout = timeout
+        self._retries = retries
+        self._client: "httpx.AsyncClient | None" = None
+
+    async def run(self, action: str, **payload) -> Any:
+        # Imported on first use to keep importing the application cheap
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+
+        for attempt in range(self._retries + 1):
+            try:
+                resp = await self._client.post(url=self._url, json=payload, params={"action": action})
+            except httpx.HTTPError as e:
+                error = str(e)
+            else:
+                if resp.status_code < 400:
+                    return resp.json()
+                if resp.status_code == 429:
+                    raise RateLimitExceeded
+                if resp.status_code == 503 and "Retry-After" in resp.headers:
+                    # GitHub is unavailable, the worker has already retried
+                    raise GitHubUnavailable(int(resp.headers["Retry-After"]))
+                if resp.status_code < 500:
+                    raise ValueError(f"{self._url} rejected {action}. Status: {resp.status_code}, body: {resp.text}")
+
+                error = f"status {resp.status_code}"
+
+            logger.error(f"Can't run {action} on {self._url} (attempt {attempt + 1}). Error: {error}")
+            if attempt < self._retries:
+                await asyncio.sleep(2 ** attempt)
+
+        raise GitHubUnavailable(math.ceil(settings.GITHUB_BACKOFF_MAX))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def get_fetch_executor() -> FetchExecutor:
+    """
+    Creates the fetch executor configured by FETCH_EXECUTOR. By default, actions are sent to YCF_URL if it's specified
+    and run in-process otherwise.
+
+    :return: Configured FetchExecutor instance.
+    """
+
+    mode = settings.FETCH_EXECUTOR or ("remote" if settings.YCF_URL else "inprocess")
+
+    if mode == "process":
+        return ProcessPoolFetchExecutor(settings.FETCH_PROCESS_WORKERS)
+
+    if mode == "remote":
+        url = settings.FETCH_WORKER_URL or settings.YCF_URL
+        assert url is not None, "FETCH_WORKER_URL or YCF_URL is required for the remote fetch executor"
+        return RemoteExecutor(url, settings.FETCH_TIMEOUT, settings.FETCH_RETRIES)
+
+    return InProcessExecutor()
+
+
+fetch_executor = get_fetch_executor()
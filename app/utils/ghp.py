@@ -1,13 +1,24 @@
+import math
+import random
 import re
-from datetime import datetime, date
+import time
+from datetime import date
+from typing import Any, TYPE_CHECKING
 
-import requests
-from requests import RequestException
+import msgspec
 
 from app.core import settings
-from app.core.exceptions import RateLimitExceeded
+from app.core.exceptions import GitHubUnavailable, RateLimitExceeded, NoSuchRepository
 from app.core.logging_config import logger
-from app.schemas import repos
+from app.core.profiling import span
+from app.schemas import github
+from app.schemas.records import RepositoryRecord
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.metrics import metrics
+from app.utils.token_pool import TokenPool
+
+if TYPE_CHECKING:
+    import requests
 
 
 class GHParser:
@@ -19,47 +30,177 @@ class GHParser:
         self._headers = {
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
-            "Authorization": f"Bearer {settings.TOKEN}"
         }
+        self._tokens = TokenPool(settings.github_tokens)
+        self._breaker = CircuitBreaker("github", settings.GITHUB_BREAKER_THRESHOLD, settings.GITHUB_BREAKER_RESET)
 
-        self._search_repos_url = "https://api.github.com/search/repositories"
+        self._search_repos_url = settings.GITHUB_API_URL + "/search/repositories"
         self._search_repos_params = {
             "sort": "stars",
             "q": "stars:>0",
             "per_page": 100
         }
 
-        self._list_repo_activity_url = "https://api.github.com/repos/{owner}/{repo_name}/activity"
+        self._repo_url = settings.GITHUB_API_URL + "/repos/{owner}/{repo_name}"
+
+        self._list_repo_activity_url = settings.GITHUB_API_URL + "/repos/{owner}/{repo_name}/activity"
         self._list_repo_activity_params = {
             "time_period": "year",
             "per_page": 100
         }
 
-    def _send_request(self, url: str, params: dict) -> tuple[dict, str | None]:
+        self._repo_decoder = msgspec.json.Decoder(github.Repository)
+        self._search_repos_decoder = msgspec.json.Decoder(github.SearchRepositories)
+        self._list_repo_activity_decoder = msgspec.json.Decoder(list[github.Activity])
+        self._error_decoder = msgspec.json.Decoder(github.Error)
+
+    def dump_state(self) -> dict:
+        """
+        Returns the state of the token pool and of the circuit breaker, so it can be passed to another process.
+
+        :return: Picklable state.
+        """
+
+        return {"tokens": self._tokens.dump(), "breaker": self._breaker.dump()}
+
+    def load_state(self, state: dict) -> None:
+        """
+        Applies the state of the token pool and of the circuit breaker observed by another process.
+
+        :param state: State returned by `dump_state`.
+        """
+
+        self._tokens.load(state["tokens"])
+        self._breaker.load(state["breaker"])
+
+    def _get(self, url: str, params: dict, timeout: float, resource: str) -> "requests.Response":
+        """
+        Sends a GET request with the token that has the largest remaining quota.
+
+        :param url: The URL to send the request.
+        :param params: Parameters to include in the request.
+        :param timeout: Timeout of the request in seconds.
+        :param resource: Rate limit resource of the request, "core" or "search".
+        :raises RateLimitExceeded: If all tokens are exhausted.
+        :raises requests.RequestException: If the request failed.
+        :return: Response of the request.
+        """
+
+        # Imported on first use to keep importing the application cheap
+        import requests
+
+        # Each exhausted token is quarantined by the pool, so every attempt uses another token
+        for _ in range(max(len(self._tokens), 1)):
+            token = self._tokens.acquire(resource)
+            try:
+                with span("github", url):
+                    resp = requests.get(
+                        headers=self._headers | ({"Authorization": f"Bearer {token.token}"} if token else {}),
+                        url=url,
+                        params=params,
+                        timeout=timeout
+                    )
+            except BaseException:
+                self._tokens.release(token, resource)
+                raise
+            metrics.inc("github_requests", status=resp.status_code)
+
+            if not self._tokens.update(token, resp.status_code, resp.headers, resource):
+                return resp
+
+        raise RateLimitExceeded
+
+    def _send_request(
+            self,
+            url: str,
+            params: dict,
+            decoder: msgspec.json.Decoder,
+            resource: str = "core"
+    ) -> tuple[Any, str | None]:
         """
         Sends a request to the specified URL with parameters.
 
+        Connection errors, timeouts and server errors are retried with jittered exponential backoff
+        until GITHUB_DEADLINE seconds pass. Requests are rejected right away while the circuit breaker is open.
+
         :param url: The URL to send the request.
         :param params: Parameters to include in the request.
-        :return: A tuple containing response data and header link.
+        :param decoder: Decoder of the successful response body, it decodes only the fields declared in its type.
+        :param resource: Rate limit resource of the request, "core" or "search".
+        :raises NoSuchRepository: If the requested resource doesn't exist.
+        :raises GitHubUnavailable: If GitHub keeps failing or the circuit breaker is open.
+        :return: A tuple containing decoded response data (None if the request failed) and header link.
+        """
+
+        # Imported on first use to keep importing the application cheap
+        import requests
+
+        deadline = time.monotonic() + settings.GITHUB_DEADLINE
+        for attempt in range(settings.GITHUB_RETRIES + 1):
+            # Every call allowed by the breaker records its outcome, otherwise a trial call would keep it half-open
+            self._breaker.before_call()
+            try:
+                timeout = max(min(settings.GITHUB_TIMEOUT, deadline - time.monotonic()), 1)
+                resp = self._get(url, params, timeout=timeout, resource=resource)
+            except requests.RequestException as e:
+                self._breaker.record_failure()
+                error = str(e)
+            except RateLimitExceeded:
+                # Exhausted tokens say nothing about the health of GitHub
+                self._breaker.release()
+                raise
+            except BaseException:
+                self._breaker.record_failure()
+                raise
+            else:
+                if resp.status_code < 500:
+                    self._breaker.record_success()
+                    return self._decode(url, resp, decoder)
+
+                self._breaker.record_failure()
+                error = f"status {resp.status_code}"
+
+            metrics.inc("github_request_failures")
+            logger.warning(f"Can't get data from {url} (attempt {attempt + 1}). Error: {error}")
+
+            # Full jitter spreads the retries of concurrent fetches over the backoff interval
+            delay = random.uniform(0, min(settings.GITHUB_BACKOFF_MAX, settings.GITHUB_BACKOFF_BASE * 2 ** attempt))
+            if attempt == settings.GITHUB_RETRIES or time.monotonic() + delay >= deadline:
+                break
+
+            time.sleep(delay)
+
+        raise GitHubUnavailable(math.ceil(settings.GITHUB_BACKOFF_MAX))
+
+    def _decode(self, url: str, resp: "requests.Response", decoder: msgspec.json.Decoder) -> tuple[Any, str | None]:
+        """
+        Decodes a response of GitHub.
+
+        :param url: The URL of the request.
+        :param resp: Response with a status code below 500.
+        :param decoder: Decoder of the successful response body.
+        :raises NoSuchRepository: If the requested resource doesn't exist.
+        :raises RateLimitExceeded: If the API rate limit is exceeded.
+        :return: A tuple containing decoded response data (None if the request failed) and header link.
         """
 
         try:
-            resp = requests.get(
-                headers=self._headers,
-                url=url,
-                params=params
-            )
+            if resp.status_code == 404:
+                raise NoSuchRepository
+
+            if resp.status_code != 200:
+                error = self._error_decoder.decode(resp.content)
+                if "API rate limit exceeded" in error.message:
+                    raise RateLimitExceeded
 
-            data = resp.json()
-            if isinstance(data, dict) and "API rate limit exceeded" in data.get("msg", ""):
-                raise RateLimitExceeded
+                logger.error(f"Can't parse data from {url}. Status: {resp.status_code}, error: {error.message}")
+                return None, None
 
-            return data, resp.headers.get("Link", None)
-        except RequestException as e:
+            return decoder.decode(resp.content), resp.headers.get("Link", None)
+        except msgspec.DecodeError as e:
             logger.error(f"Can't parse data from {url}. Error: {e}")
 
-        return dict(), None
+        return None, None
 
     @staticmethod
     def convert_date(date_string: str = None) -> date:
@@ -70,8 +211,8 @@ class GHParser:
         :return: Date object extracted from the timestamp.
         """
 
-        _format = "%Y-%m-%dT%H:%M:%SZ"
-        return datetime.strptime(date_string, _format).date()
+        # Timestamps have the fixed format "%Y-%m-%dT%H:%M:%SZ", so slicing is much cheaper than strptime
+        return date.fromisoformat(date_string[:10])
 
     @staticmethod
     def _next_url(link: str) -> str | None:
@@ -88,67 +229,89 @@ class GHParser:
         if url := re.match(r"<https?://[^>]+after=[^>]+>", link):
             return url.group()[1:-1]
 
-    def parse_activity(self, repo_name: str, owner: str, latest_date: date | None) -> list[tuple[date, str]]:
+    def repo_exists(self, repo_name: str, owner: str) -> bool | None:
         """
-        Parses activity for a given repository.
+        Checks if a repository exists on GitHub.
 
         :param repo_name: Name of the repository.
         :param owner: Owner of the repository.
-        :param latest_date: The latest date to retrieve activity from.
-        :return: A list of tuples containing date and actor login.
+        :return: True if it exists, False if it doesn't, None if it can't be checked.
         """
 
-        url = self._list_repo_activity_url.format(owner=owner, repo_name=repo_name)
-        items = list()
-
-        while True:
-            data, link = self._send_request(
-                url=url,
-                params=self._list_repo_activity_params,
+        try:
+            data, _ = self._send_request(
+                url=self._repo_url.format(owner=owner, repo_name=repo_name),
+                params={},
+                decoder=self._repo_decoder
             )
+        except NoSuchRepository:
+            return False
 
-            if not isinstance(data, list):
-                break
+        return True if data else None
 
-            if latest_date and self.convert_date(data[0].get("timestamp")) <= latest_date:
-                break
+    def parse_activity_page(
+            self,
+            repo_name: str,
+            owner: str,
+            url: str | None = None
+    ) -> tuple[list[tuple[str, str]], str | None]:
+        """
+        Parses a page of activity for a given repository, the crawl over pages is driven by the caller.
 
-            items.extend(data)
+        :param repo_name: Name of the repository.
+        :param owner: Owner of the repository.
+        :param url: URL of the page returned with the previous page, None for the first page.
+        :raises GitHubUnavailable: If GitHub keeps failing or its response can't be parsed.
+        :return: A tuple containing the list of timestamps and actor logins, newest first, and the URL of the next page.
+        """
 
-            if (url := self._next_url(link)) is None:
-                break
+        try:
+            data, link = self._send_request(
+                url=url or self._list_repo_activity_url.format(owner=owner, repo_name=repo_name),
+                params=self._list_repo_activity_params,
+                decoder=self._list_repo_activity_decoder
+            )
+        except NoSuchRepository:
+            return list(), None
+
+        if data is None:
+            # An error response must not be mistaken for a repository without activity
+            raise GitHubUnavailable(math.ceil(settings.GITHUB_BACKOFF_MAX))
 
         return [
-            (item.get("timestamp"), item.get("actor").get("login"))
-            for item in items
-        ]
+            (item.timestamp, item.actor.login)
+            for item in data
+            if item.actor is not None
+        ], self._next_url(link)
 
-    def parse_top_repos(self) -> list[repos.Repository]:
+    def parse_top_repos(self) -> list[RepositoryRecord]:
         """
         Parses top repositories from GitHub.
 
-        :return: A list of Repository objects.
+        :return: A list of RepositoryRecord objects.
         """
 
         data, _ = self._send_request(
             url=self._search_repos_url,
-            params=self._search_repos_params
+            params=self._search_repos_params,
+            decoder=self._search_repos_decoder,
+            resource="search"
         )
 
         return [
-            repos.Repository(
-                repo=item.get("full_name"),
-                owner=item.get("owner").get("login"),
-                forks=item.get("forks"),
-                watchers=item.get("watchers"),
-                open_issues=item.get("open_issues"),
-                language=item.get("language", None),
+            RepositoryRecord(
+                repo=item.full_name,
+                owner=item.owner.login,
+                forks=item.forks,
+                watchers=item.watchers,
+                open_issues=item.open_issues,
+                language=item.language,
                 position_prev=None,
-                stars=item.get("stargazers_count"),
+                stars=item.stargazers_count,
                 position_cur=0,
             )
-            for i, item in enumerate(items)
-        ] if (items := data.get("items"), None) else list()
+            for item in data.items
+        ] if data else list()
 
 
 github_parser = GHParser()
@@ -0,0 +1,74 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from app.core.logging_config import logger
+from app.utils.metrics import metrics
+
+
+class LoopMonitor:
+    """
+    Monitor of the event loop responsiveness.
+
+    A task sleeping for `interval` seconds records how much later than expected it wakes up into the `event_loop_lag`
+    histogram. A watchdog thread logs the stack of the event loop thread once the task hasn't woken up for `threshold`
+    seconds, which points to the callback blocking the loop.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self._interval = interval
+        self._threshold = threshold
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def _sample(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            metrics.observe("event_loop_lag", time.perf_counter() - started - self._interval)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self._threshold / 4):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self._interval
+            if blocked < self._threshold or reported == heartbeat:
+                continue
+
+            # Reported once per stall, the stack is taken while the loop is still blocked
+            reported = heartbeat
+            metrics.inc("event_loop_blocked")
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "unavailable"
+            logger.warning(f"Event loop is blocked for more than {blocked:.3f} seconds. Stack:\n{stack}")
+
+    def start(self) -> None:
+        """
+        Starts monitoring the running event loop.
+        """
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        """
+        Stops monitoring.
+        """
+
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
@@ -0,0 +1,153 @@
+import threading
+from collections import defaultdict, deque
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and histograms, exported through the metrics endpoint.
+
+    Metrics are identified by a name and optional labels, e.g. `github_requests{token="0"}`.
+    The registry is thread-safe, since GitHub requests are also made outside the event loop thread.
+    """
+
+    def __init__(self, histogram_size: int = 1024):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = dict()
+        self._histograms: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=histogram_size))
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> str:
+        """
+        Builds the metric key from its name and labels.
+
+        :param name: Name of the metric.
+        :param labels: Labels of the metric.
+        :return: Metric key.
+        """
+
+        if not labels:
+            return name
+
+        return "{}{{{}}}".format(name, ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increments a counter.
+
+        :param name: Name of the counter.
+        :param value: Value to add.
+        :param labels: Labels of the counter.
+        """
+
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """
+        Sets the current value of a gauge.
+
+        :param name: Name of the gauge.
+        :param value: Current value.
+        :param labels: Labels of the gauge.
+        """
+
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def remove(self, name: str, **labels) -> None:
+        """
+        Removes a gauge, e.g. of an object that no longer exists.
+
+        :param name: Name of the gauge.
+        :param labels: Labels of the gauge.
+        """
+
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges.pop(key, None)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Records a sample of a histogram. Only the latest samples are kept.
+
+        :param name: Name of the histogram.
+        :param value: Observed value.
+        :param labels: Labels of the histogram.
+        """
+
+        key = self._key(name, labels)
+        with self._lock:
+            self._histograms[key].append(value)
+
+    def drain(self) -> dict:
+        """
+        Returns the metrics recorded since the previous call and resets the registry.
+
+        Used by worker processes to hand their metrics over to the parent process, see `merge`.
+
+        :return: Dictionary with counters, gauges and histogram samples.
+        """
+
+        with self._lock:
+            data = {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {key: list(samples) for key, samples in self._histograms.items()},
+            }
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+        return data
+
+    def merge(self, data: dict) -> None:
+        """
+        Adds metrics drained from another registry: counters are summed, gauges are replaced
+        and histogram samples are appended.
+
+        :param data: Metrics returned by `drain`.
+        """
+
+        with self._lock:
+            for key, value in data["counters"].items():
+                self._counters[key] += value
+            self._gauges.update(data["gauges"])
+            for key, samples in data["histograms"].items():
+                self._histograms[key].extend(samples)
+
+    @staticmethod
+    def _percentile(samples: list[float], q: float) -> float:
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current values of all metrics. Histograms are summarized by percentiles of the kept samples.
+
+        :return: Dictionary with counters, gauges and histograms.
+        """
+
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: sorted(samples) for key, samples in self._histograms.items() if samples}
+
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {
+                key: {
+                    "count": len(samples),
+                    "p50": self._percentile(samples, 0.5),
+                    "p95": self._percentile(samples, 0.95),
+                    "p99": self._percentile(samples, 0.99),
+                    "max": samples[-1],
+                }
+                for key, samples in histograms.items()
+            }
+        }
+
+
+metrics = Metrics()
@@ -1,9 +1,19 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from app.services.movers import movers_service
 from app.services.repos import repos_service
 
 
+async def refresh_top_repos() -> None:
+    """
+    Updates top repositories and the precomputed movers.
+    """
+
+    await repos_service.update_top_repos()
+    await movers_service.update_movers()
+
+
 def configure_scheduler():
     """
     Configures and returns an AsyncIOScheduler with a cron job to update top repositories.
@@ -18,13 +28,10 @@ def configure_scheduler():
     """
     scheduler = AsyncIOScheduler()
 
-    # Setting up cron jobs for each 1-minute interval within a 24-hour period
-    for hour in range(0, 24):
-        for minute in range(0, 60):
-            trigger = CronTrigger(hour=hour, minute=minute)
-            scheduler.add_job(
-                repos_service.update_top_repos,
-                trigger=trigger,
-            )
+    # A single cron job firing every minute of every hour
+    scheduler.add_job(
+        refresh_top_repos,
+        trigger=CronTrigger(minute="*"),
+    )
 
     return scheduler
@@ -0,0 +1,171 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+from app.core.exceptions import RateLimitExceeded
+from app.core.logging_config import logger
+from app.utils.metrics import metrics
+
+
+@dataclass
+class Quota:
+    """
+    Quota of a token for one rate limit resource, as reported by the rate limit headers of the latest response.
+    """
+
+    remaining: int = 5000
+    reset_at: float = 0.0
+    quarantined_until: float = 0.0
+
+
+@dataclass
+class TokenState:
+    """
+    Quota state of a single GitHub token.
+    """
+
+    token: str
+    # Index of the token in the pool, the token itself never leaves the process
+    label: str
+    # Quota by rate limit resource (X-RateLimit-Resource), e.g. "core" or "search"
+    quotas: dict[str, Quota] = field(default_factory=dict)
+
+    def quota(self, resource: str) -> Quota:
+        if (quota := self.quotas.get(resource, None)) is None:
+            quota = self.quotas[resource] = Quota()
+
+        return quota
+
+
+class TokenPool:
+    """
+    Pool of GitHub tokens. Every request uses the token with the largest remaining quota of the requested
+    rate limit resource, tokens exhausted for a resource are quarantined for it until their quota is reset.
+    GitHub limits the resources separately, e.g. the search requests don't use the quota of the core requests.
+    """
+
+    def __init__(self, tokens: list[str]):
+        self._lock = threading.Lock()
+        self._states = [
+            TokenState(token=token, label=str(i))
+            for i, token in enumerate(dict.fromkeys(tokens))
+        ]
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def dump(self) -> list[dict[str, tuple[int, float, float]]]:
+        """
+        Returns the quota state of every token, so it can be passed to another process.
+
+        :return: Remaining requests, reset time and quarantine end by resource of every token, in the order of the pool.
+        """
+
+        with self._lock:
+            return [
+                {
+                    resource: (quota.remaining, quota.reset_at, quota.quarantined_until)
+                    for resource, quota in state.quotas.items()
+                }
+                for state in self._states
+            ]
+
+    def load(self, dumped: list[dict[str, tuple[int, float, float]]]) -> None:
+        """
+        Applies the quota state observed by another process. The latest observation wins,
+        a token stays quarantined until the later of both quarantine ends.
+
+        :param dumped: Quota state returned by `dump` of a pool with the same tokens.
+        """
+
+        with self._lock:
+            for state, quotas in zip(self._states, dumped):
+                for resource, (remaining, reset_at, quarantined_until) in quotas.items():
+                    quota = state.quota(resource)
+                    quota.remaining = remaining
+                    quota.reset_at = reset_at
+                    quota.quarantined_until = max(quota.quarantined_until, quarantined_until)
+
+    def acquire(self, resource: str = "core") -> TokenState | None:
+        """
+        Picks the available token with the largest remaining quota of a resource.
+
+        :param resource: Rate limit resource of the request.
+        :raises RateLimitExceeded: If all tokens are quarantined for the resource.
+        :return: Token state or None if the pool is empty (requests are sent unauthenticated).
+        """
+
+        if not self._states:
+            return None
+
+        now = time.time()
+        with self._lock:
+            available = [state for state in self._states if state.quota(resource).quarantined_until <= now]
+            if not available:
+                raise RateLimitExceeded
+
+            state = max(available, key=lambda s: s.quota(resource).remaining)
+            # Reserve the request, so concurrent requests are spread across tokens before the response arrives
+            state.quota(resource).remaining -= 1
+
+        metrics.inc("github_token_requests", token=state.label, resource=resource)
+        return state
+
+    def release(self, state: TokenState | None, resource: str = "core") -> None:
+        """
+        Returns the request reserved by `acquire` when GitHub hasn't reported the quota, e.g. the request failed.
+
+        :param state: Token used for the request.
+        :param resource: Rate limit resource of the request.
+        """
+
+        if state is None:
+            return
+
+        with self._lock:
+            state.quota(resource).remaining += 1
+
+    def update(self, state: TokenState | None, status_code: int, headers: dict, resource: str = "core") -> bool:
+        """
+        Updates the token quota from the rate limit headers of a response.
+
+        :param state: Token used for the request.
+        :param status_code: Status code of the response.
+        :param headers: Headers of the response.
+        :param resource: Rate limit resource of the request, unless the response reports another one.
+        :return: True if the token is exhausted and the request should be retried with another one.
+        """
+
+        if state is None:
+            return False
+
+        remaining, reset_at = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset")
+        reported = headers.get("X-RateLimit-Resource", resource) if remaining is not None else resource
+        if remaining is None or reported != resource:
+            # The quota of the resource is unknown, e.g. the response comes from a proxy, so the reservation is returned
+            self.release(state, resource)
+        resource = reported
+        exhausted = status_code in (403, 429) and (remaining == "0" or "Retry-After" in headers)
+
+        with self._lock:
+            quota = state.quota(resource)
+            if remaining is not None:
+                quota.remaining = int(remaining)
+            if reset_at is not None:
+                quota.reset_at = float(reset_at)
+
+            if exhausted or quota.remaining <= 0:
+                retry_after = float(headers.get("Retry-After", 60))
+                quota.quarantined_until = max(quota.reset_at, time.time() + retry_after)
+
+        metrics.set("github_token_remaining", quota.remaining, token=state.label, resource=resource)
+        metrics.set(
+            "github_token_quarantined", int(quota.quarantined_until > time.time()), token=state.label, resource=resource
+        )
+        if exhausted:
+            metrics.inc("github_token_exhausted", token=state.label, resource=resource)
+            logger.warning(
+                f"GitHub token {state.label} is exhausted for {resource} until {time.ctime(quota.quarantined_until)}"
+            )
+
+        return exhausted
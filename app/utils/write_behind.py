@@ -0,0 +1,144 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from app.core.logging_config import logger
+from app.utils.metrics import metrics
+
+
+class WriteBehindQueue:
+    """
+    Collects rows written by many callers and flushes them in batches, when the batch reaches `max_size` rows
+    or `max_delay` seconds after the first pending row, whichever comes first.
+
+    A failed batch is retried `max_retries` times with exponential backoff, then returned to the queue and written
+    with the next batch, as is a batch interrupted by a cancellation. Rows that can't be written on `drain` are dropped.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            flush: Callable[[list], Awaitable[bool]],
+            max_size: int,
+            max_delay: float,
+            max_retries: int
+    ):
+        self._name = name
+        self._flush = flush
+        self._max_size = max_size
+        self._max_delay = max_delay
+        self._max_retries = max_retries
+
+        self._rows: list = list()
+        self._flushing: list = list()
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def put(self, rows: list) -> None:
+        """
+        Adds rows to the queue. The rows are written in the background.
+
+        :param rows: Rows to write.
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        self._rows.extend(rows)
+        self._pending.set()
+        if len(self._rows) >= self._max_size:
+            self._full.set()
+
+        metrics.set("write_behind_pending", len(self._rows), queue=self._name)
+
+    def pending(self) -> list:
+        """
+        Returns the rows that aren't written yet, including the batch being written right now.
+        """
+
+        return self._flushing + self._rows
+
+    def queued(self) -> list:
+        """
+        Returns the rows waiting for the next batches, without the batch being written right now.
+        """
+
+        return self._rows
+
+    async def _run(self) -> None:
+        while True:
+            await self._pending.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self._max_delay)
+            except asyncio.TimeoutError:
+                pass
+
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> bool:
+        """
+        Writes the next batch of rows.
+
+        :return: True if the batch was written, False if it was returned to the queue.
+        """
+
+        self._flushing, self._rows = self._rows[:self._max_size], self._rows[self._max_size:]
+        if len(self._rows) < self._max_size:
+            self._full.clear()
+        if not self._rows:
+            self._pending.clear()
+        metrics.set("write_behind_pending", len(self._rows), queue=self._name)
+        if not self._flushing:
+            return True
+
+        try:
+            for attempt in range(self._max_retries + 1):
+                if await self._flush(self._flushing):
+                    metrics.inc("write_behind_flushed_rows", len(self._flushing), queue=self._name)
+                    metrics.observe("write_behind_batch_size", len(self._flushing), queue=self._name)
+                    self._flushing = list()
+                    return True
+
+                metrics.inc("write_behind_failed_batches", queue=self._name)
+                if attempt < self._max_retries:
+                    await asyncio.sleep(2 ** attempt)
+        except BaseException:
+            # Interrupted by a cancellation or failed, the rows are written again, the writes are idempotent
+            self._requeue()
+            raise
+
+        logger.error(f"Can't write {len(self._flushing)} rows of {self._name} after {self._max_retries} retries")
+        self._requeue()
+        return False
+
+    def _requeue(self) -> None:
+        """
+        Returns the batch being written to the front of the queue.
+        """
+
+        self._rows = self._flushing + self._rows
+        self._flushing = list()
+        self._pending.set()
+        if len(self._rows) >= self._max_size:
+            self._full.set()
+        metrics.set("write_behind_pending", len(self._rows), queue=self._name)
+
+    async def drain(self) -> None:
+        """
+        Stops the background flushing and writes all pending rows.
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._rows:
+            if not await self._flush_batch():
+                logger.error(f"Dropped {len(self._rows)} rows of {self._name}")
+                metrics.inc("write_behind_dropped_rows", len(self._rows), queue=self._name)
+                self._rows = list()
+                metrics.set("write_behind_pending", 0, queue=self._name)
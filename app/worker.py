@@ -0,0 +1,47 @@
+import asyncio
+
+from fastapi import Body, FastAPI, Query, Request
+from starlette import status
+from starlette.responses import JSONResponse
+
+from app.core.exceptions import GitHubUnavailable, RateLimitExceeded
+from app.utils.executors import handle
+
+app = FastAPI(title="Github fetch worker")
+
+
+@app.exception_handler(RateLimitExceeded)
+def _rate_limit_handler(request: Request, e: RateLimitExceeded) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_429_TOO_MANY_REQUESTS, content={"message": "Exceeded API rate limit"})
+
+
+@app.exception_handler(GitHubUnavailable)
+def _unavailable_handler(request: Request, e: GitHubUnavailable) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"message": "github.com is unavailable"},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+@app.exception_handler(ValueError)
+def _unknown_action_handler(request: Request, e: ValueError) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"message": str(e)})
+
+
+@app.post("/")
+async def run_action(
+        action: str = Query(description="Name of the fetch action."),
+        payload: dict = Body(default_factory=dict, description="Parameters of the action."),
+):
+    """
+    Runs a fetch action for the remote fetch executor. Stands in for the Yandex Cloud function locally.
+
+    Errors are answered with the status codes expected by RemoteExecutor.
+
+    :param action: Name of the fetch action.
+    :param payload: Parameters of the action.
+    :return: JSON-compatible result of the action.
+    """
+
+    return await asyncio.to_thread(handle, action, payload)
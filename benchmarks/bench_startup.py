@@ -0,0 +1,69 @@
+"""
+Measures the cold start of the application: the time to import app.main and, optionally, the time until a uvicorn
+process answers the liveness and readiness probes.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--serve] [--port 8765]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def measure_import(runs: int) -> None:
+    samples = [
+        float(subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1])
+        for _ in range(runs)
+    ]
+    print(f"import app.main   median {statistics.median(samples) * 1000:8.1f} ms  max {max(samples) * 1000:8.1f} ms")
+
+
+def wait_for(url: str, started: float, timeout: float = 60) -> float | None:
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+
+
+def measure_serve(port: int) -> None:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+    try:
+        for probe in ("live", "ready"):
+            elapsed = wait_for(f"http://127.0.0.1:{port}/api/health/{probe}", started)
+            print(f"{probe:<17} {'timeout' if elapsed is None else f'{elapsed * 1000:8.1f} ms'}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="Also start uvicorn and wait for the probes.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    measure_import(args.runs)
+    if args.serve:
+        measure_serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
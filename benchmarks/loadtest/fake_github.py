@@ -0,0 +1,82 @@
+"""
+Stand-in for the GitHub API used by the load tests. It serves the endpoints used by GHParser with generated,
+deterministic data and a configurable latency.
+
+- /search/repositories returns 100 repositories, their stars drift on every call, so each scheduler tick has updates;
+- /repos/{owner}/{repo} returns 404 for repositories named "missing-*";
+- /repos/{owner}/{repo}/activity returns FAKE_GITHUB_PAGES pages of 100 items linked with `after=` cursors.
+
+Usage: uvicorn benchmarks.loadtest.fake_github:app --port 8081
+Environment: FAKE_GITHUB_LATENCY (seconds, default 0.02), FAKE_GITHUB_PAGES (default 3).
+"""
+
+import asyncio
+import itertools
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse
+
+LATENCY = float(os.environ.get("FAKE_GITHUB_LATENCY", 0.02))
+PAGES = int(os.environ.get("FAKE_GITHUB_PAGES", 3))
+PER_PAGE = 100
+LANGUAGES = ["Python", "TypeScript", "Go", "Rust", "C++", None]
+
+app = FastAPI(title="Fake GitHub API")
+_searches = itertools.count()
+
+
+@app.get("/search/repositories")
+async def search_repositories():
+    await asyncio.sleep(LATENCY)
+    tick = next(_searches)
+    return {
+        "items": [
+            {
+                "full_name": f"owner{i % 20}/repo{i}",
+                "owner": {"login": f"owner{i % 20}"},
+                "forks": 1000 + i * 7,
+                "watchers": 5000 + i * 11,
+                "open_issues": i,
+                "stargazers_count": 100_000 - i * 500 + (tick * (i % 7)) % 400,
+                "language": LANGUAGES[i % len(LANGUAGES)],
+            }
+            for i in range(100)
+        ]
+    }
+
+
+@app.get("/repos/{owner}/{repo}")
+async def get_repository(owner: str, repo: str):
+    await asyncio.sleep(LATENCY)
+    if repo.startswith("missing-"):
+        return JSONResponse(status_code=404, content={"message": "Not Found"})
+
+    return {"full_name": f"{owner}/{repo}"}
+
+
+@app.get("/repos/{owner}/{repo}/activity")
+async def list_activity(request: Request, owner: str, repo: str, after: str | None = None):
+    await asyncio.sleep(LATENCY)
+    if repo.startswith("missing-"):
+        return JSONResponse(status_code=404, content={"message": "Not Found"})
+
+    page = int(after.removeprefix("cursor")) if after else 0
+    seed = zlib.crc32(f"{owner}/{repo}".encode())
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    items = [
+        {
+            "timestamp": (now - timedelta(hours=n * 3 + seed % 3)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "actor": {"login": f"user{(seed + n) % 37}"},
+        }
+        for n in range(page * PER_PAGE, (page + 1) * PER_PAGE)
+    ]
+
+    headers = dict()
+    if page + 1 < PAGES:
+        url = f"{str(request.base_url).rstrip('/')}/repos/{owner}/{repo}/activity?after=cursor{page + 1}"
+        headers["Link"] = f'<{url}>; rel="next"'
+
+    return JSONResponse(content=items, headers=headers)
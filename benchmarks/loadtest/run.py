@@ -0,0 +1,248 @@
+"""
+Load test of the public endpoints against a stand-in GitHub (benchmarks.loadtest.fake_github) and a local Postgres.
+
+Scenarios, mixed by weight:
+- top100 - polling of /api/repos/top100 with every RepositorySort option in both orders;
+- warm - /api/repo/{owner}/{repo}/activity of the top repositories, synced during the warmup;
+- cold - /api/repo/{owner}/{repo}/activity of repositories never seen before, each one syncs with GitHub.
+
+Scheduler ticks run during the load (see benchmarks.loadtest.serve). The report contains throughput, latency
+percentiles per scenario, and the event loop lag and DB pool wait percentiles from /api/metrics. If any threshold
+is exceeded the exit code is 1, so the run can gate CI.
+
+Usage:
+    python -m benchmarks.loadtest.run --spawn --duration 30 --concurrency 32
+    python -m benchmarks.loadtest.run --url http://127.0.0.1:8000 --mix top100=0.5,warm=0.4,cold=0.1 --max-p99 250
+
+With --spawn the stand-in GitHub and the application are started as subprocesses, PSQL_URL must point to
+a disposable database.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+from app.schemas.repos import RepositorySort
+
+WARM_REPOS = [f"owner{i % 20}/repo{i}" for i in range(20)]
+
+
+class Scenarios:
+    def __init__(self, seed: int):
+        self._random = random.Random(seed)
+        self._sorts = itertools.cycle([(sort.value, desc) for sort in RepositorySort for desc in ("true", "false")])
+        self._run = uuid.uuid4().hex[:8]
+        self._cold = itertools.count()
+        until = date.today()
+        self.date_range = {"since": str(until - timedelta(days=30)), "until": str(until)}
+
+    @staticmethod
+    def activity_url(full_name: str) -> str:
+        return f"/api/repo/{full_name.split('/')[0]}/{full_name}/activity"
+
+    def top100(self) -> tuple[str, dict]:
+        sort, desc = next(self._sorts)
+        return "/api/repos/top100", {"sort": sort, "sort_desc": desc}
+
+    def warm(self) -> tuple[str, dict]:
+        return self.activity_url(self._random.choice(WARM_REPOS)), self.date_range
+
+    def cold(self) -> tuple[str, dict]:
+        return self.activity_url(f"loadtest{self._run}/cold{next(self._cold)}"), self.date_range
+
+    def pick(self, mix: dict[str, float]) -> str:
+        return self._random.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 120) -> None:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if (await client.get("/api/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+
+    raise SystemExit("The application isn't ready")
+
+
+async def warmup(client: httpx.AsyncClient, scenarios: Scenarios) -> None:
+    for full_name in WARM_REPOS:
+        await client.get(scenarios.activity_url(full_name), params=scenarios.date_range, timeout=120)
+
+
+async def load(client: httpx.AsyncClient, scenarios: Scenarios, mix: dict[str, float], duration: float,
+               concurrency: int) -> tuple[dict, float]:
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            name = scenarios.pick(mix)
+            url, params = getattr(scenarios, name)()
+            started = time.perf_counter()
+            try:
+                status = (await client.get(url, params=params)).status_code
+            except httpx.HTTPError:
+                status = "error"
+            latencies[name].append(time.perf_counter() - started)
+            statuses[name][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        name: {
+            "requests": len(latencies[name]),
+            "rps": len(latencies[name]) / elapsed,
+            "p50": percentile(latencies[name], 0.5) * 1000,
+            "p95": percentile(latencies[name], 0.95) * 1000,
+            "p99": percentile(latencies[name], 0.99) * 1000,
+            "shed": statuses[name].get(503, 0),
+            "errors": sum(
+                count for status, count in statuses[name].items()
+                if status == "error" or status >= 500 and status != 503
+            ),
+            "statuses": {str(status): count for status, count in statuses[name].items()},
+        }
+        for name in mix
+    }, elapsed
+
+
+def server_histograms(snapshot: dict) -> dict:
+    histograms = snapshot.get("histograms", {})
+    pool_wait = [value for key, value in histograms.items() if key.startswith("db_pool_wait")]
+    lag = histograms.get("event_loop_lag", {})
+    return {
+        "loop_lag_p99": lag.get("p99", 0.0) * 1000,
+        "loop_lag_max": lag.get("max", 0.0) * 1000,
+        "pool_wait_p99": max((value["p99"] for value in pool_wait), default=0.0) * 1000,
+        "pool_wait_max": max((value["max"] for value in pool_wait), default=0.0) * 1000,
+    }
+
+
+def check(report: dict, args: argparse.Namespace) -> list[str]:
+    failures = list()
+    total = sum(item["requests"] for item in report["scenarios"].values())
+    errors = sum(item["errors"] for item in report["scenarios"].values())
+
+    if args.min_rps is not None and report["rps"] < args.min_rps:
+        failures.append(f"throughput {report['rps']:.1f} rps < {args.min_rps}")
+    if total and errors / total > args.max_errors:
+        failures.append(f"error rate {errors / total:.3f} > {args.max_errors}")
+    if args.max_p99 is not None:
+        for name in ("top100", "warm"):
+            if (item := report["scenarios"].get(name)) and item["p99"] > args.max_p99:
+                failures.append(f"{name} p99 {item['p99']:.1f} ms > {args.max_p99} ms")
+    if args.max_loop_lag is not None and report["server"]["loop_lag_p99"] > args.max_loop_lag:
+        failures.append(f"event loop lag p99 {report['server']['loop_lag_p99']:.1f} ms > {args.max_loop_lag} ms")
+    if args.max_pool_wait is not None and report["server"]["pool_wait_p99"] > args.max_pool_wait:
+        failures.append(f"DB pool wait p99 {report['server']['pool_wait_p99']:.1f} ms > {args.max_pool_wait} ms")
+
+    return failures
+
+
+def print_report(report: dict) -> None:
+    print(f"{'scenario':<8} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'shed':>6} {'errors':>6}")
+    for name, item in report["scenarios"].items():
+        print(
+            f"{name:<8} {item['requests']:>9} {item['rps']:>8.1f} {item['p50']:>8.1f} {item['p95']:>8.1f} "
+            f"{item['p99']:>8.1f} {item['shed']:>6} {item['errors']:>6}"
+        )
+    print(f"total rps {report['rps']:.1f}")
+    server = report["server"]
+    print(f"event loop lag p99 {server['loop_lag_p99']:.1f} ms, max {server['loop_lag_max']:.1f} ms")
+    print(f"DB pool wait   p99 {server['pool_wait_p99']:.1f} ms, max {server['pool_wait_max']:.1f} ms")
+
+
+def spawn(args: argparse.Namespace) -> list[subprocess.Popen]:
+    github_port, app_port = args.port + 81, args.port
+    env = os.environ | {"GITHUB_API_URL": f"http://127.0.0.1:{github_port}", "TOKEN": os.environ.get("TOKEN", "x")}
+    return [
+        subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "benchmarks.loadtest.fake_github:app",
+            "--port", str(github_port), "--log-level", "warning"
+        ], env=env),
+        subprocess.Popen([sys.executable, "-m", "benchmarks.loadtest.serve", "--port", str(app_port)], env=env),
+    ]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    mix = {
+        name: float(weight)
+        for name, weight in (item.split("=") for item in args.mix.split(","))
+    }
+    scenarios = Scenarios(args.seed)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        await wait_ready(client)
+        await warmup(client, scenarios)
+        scenario_report, elapsed = await load(client, scenarios, mix, args.duration, args.concurrency)
+        snapshot = (await client.get("/api/metrics")).json()
+
+    return {
+        "duration": elapsed,
+        "concurrency": args.concurrency,
+        "rps": sum(item["requests"] for item in scenario_report.values()) / elapsed,
+        "scenarios": scenario_report,
+        "server": server_histograms(snapshot),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="URL of the application, http://127.0.0.1:<port> by default.")
+    parser.add_argument("--spawn", action="store_true", help="Start the stand-in GitHub and the application.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", default="top100=0.6,warm=0.3,cold=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", default=None, help="Write the report to this file.")
+    parser.add_argument("--min-rps", type=float, default=None)
+    parser.add_argument("--max-p99", type=float, default=None, help="Max p99 of top100 and warm, ms.")
+    parser.add_argument("--max-errors", type=float, default=0.01, help="Max share of failed requests.")
+    parser.add_argument("--max-loop-lag", type=float, default=None, help="Max p99 of the event loop lag, ms.")
+    parser.add_argument("--max-pool-wait", type=float, default=None, help="Max p99 of the DB pool wait, ms.")
+    args = parser.parse_args()
+
+    processes = spawn(args) if args.spawn else list()
+    args.url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if failures := check(report, args):
+        print("\n".join(f"FAILED: {failure}" for failure in failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
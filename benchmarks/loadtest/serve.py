@@ -0,0 +1,58 @@
+"""
+Runs the application for the load tests: the top repositories are refreshed every LOADTEST_TICK seconds instead of
+every minute, so scheduler ticks overlap the read load. The event loop monitor is enabled unless LOOP_MONITOR_ENABLED
+is set, so the lag is reported in the `event_loop_lag` histogram of /api/metrics and blocking callbacks are logged.
+
+Usage: GITHUB_API_URL=http://127.0.0.1:8081 python -m benchmarks.loadtest.serve --port 8000
+Environment: LOADTEST_TICK (seconds, default 5).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import uvicorn
+
+os.environ.setdefault("LOOP_MONITOR_ENABLED", "true")
+
+from app.core.logging_config import logger
+from app.main import app
+from app.utils.metrics import metrics
+from app.utils.scheduler import refresh_top_repos
+
+TICK = float(os.environ.get("LOADTEST_TICK", 5))
+
+
+async def tick() -> None:
+    while True:
+        await asyncio.sleep(TICK)
+        started = time.perf_counter()
+        try:
+            await refresh_top_repos()
+        except Exception as e:
+            logger.error(f"Load test tick failed. Error: {e}")
+        metrics.observe("loadtest_tick", time.perf_counter() - started)
+
+
+@app.on_event("startup")
+async def start_load_test_tasks():
+    app.state.load_test_tasks = [asyncio.create_task(tick())]
+
+
+@app.on_event("shutdown")
+async def stop_load_test_tasks():
+    for task in app.state.load_test_tasks:
+        task.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    uvicorn.run(app, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
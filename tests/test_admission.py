@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ServiceOverloaded
+from app.utils.admission import AdmissionController
+
+
+def controller(limit: int = 1, max_queue: int = 2) -> AdmissionController:
+    return AdmissionController(name="test", limit=limit, max_queue=max_queue, retry_after=5)
+
+
+def test_operations_above_the_limit_wait():
+    async def run():
+        admission = controller(limit=2)
+        running, peak = 0, 0
+
+        async def operation():
+            nonlocal running, peak
+            async with admission.admit():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[operation() for _ in range(4)])
+        return peak, admission._active, admission._queued
+
+    assert asyncio.run(run()) == (2, 0, 0)
+
+
+def test_full_queue_rejects_operations():
+    async def run():
+        admission = controller(limit=1, max_queue=1)
+        release = asyncio.Event()
+
+        async def operation():
+            async with admission.admit():
+                await release.wait()
+
+        tasks = [asyncio.create_task(operation()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceOverloaded):
+            async with admission.admit():
+                pass
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+
+def test_waiters_are_admitted_by_priority():
+    async def run():
+        admission = controller(limit=1, max_queue=3)
+        release = asyncio.Event()
+        order = list()
+
+        async def operation(name: str, priority: int):
+            async with admission.admit(priority):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(operation("first", 0))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(operation(name, priority)) for name, priority in (("low", 2), ("high", 1))]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, *tasks)
+        return order
+
+    assert asyncio.run(run()) == ["first", "high", "low"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        admission = controller(limit=1, max_queue=1)
+        release = asyncio.Event()
+
+        async def operation():
+            async with admission.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(operation())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(operation())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        queued = admission._queued
+
+        release.set()
+        await holder
+        return queued, admission._active
+
+    assert asyncio.run(run()) == (0, 0)
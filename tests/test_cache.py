@@ -0,0 +1,42 @@
+import pytest
+
+from app.utils.cache import VersionedCache
+
+
+@pytest.fixture
+def cache() -> VersionedCache:
+    cache = VersionedCache(max_size=2)
+    cache.enabled = True
+    cache.invalidate("v1")
+    return cache
+
+
+def test_disabled_cache_stores_nothing():
+    cache = VersionedCache(max_size=2)
+    cache.set("key", 1, cache.version)
+    assert cache.get("key", "missing") == "missing"
+
+
+def test_values_read_at_an_old_version_are_not_stored(cache):
+    version = cache.version
+    cache.invalidate("v2")
+    cache.set("key", 1, version)
+    assert cache.get("key") is None
+
+    cache.set("key", 2, cache.version)
+    assert cache.get("key") == 2
+
+
+def test_invalidate_drops_entries(cache):
+    cache.set("key", 1, cache.version)
+    cache.invalidate("v2")
+    assert cache.get("key") is None
+    assert cache.version == "v2"
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("a", 1, cache.version)
+    cache.set("b", 2, cache.version)
+    assert cache.get("a") == 1
+    cache.set("c", 3, cache.version)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
@@ -0,0 +1,54 @@
+import pytest
+
+from app.core.exceptions import GitHubUnavailable
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+def open_breaker(reset_timeout: float) -> CircuitBreaker:
+    breaker = CircuitBreaker(name="test", failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(name="test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(GitHubUnavailable):
+        breaker.before_call()
+
+
+def test_single_trial_call_is_allowed_after_the_timeout():
+    breaker = open_breaker(reset_timeout=0)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(GitHubUnavailable):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_call_opens_the_circuit():
+    breaker = open_breaker(reset_timeout=60)
+    breaker._opened_at -= 60
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(GitHubUnavailable):
+        breaker.before_call()
+
+
+def test_released_trial_call_allows_the_next_one():
+    breaker = open_breaker(reset_timeout=60)
+    breaker._opened_at -= 60
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The parent process imports the executors first and the application only through them, as under uvicorn
+_SCRIPT = textwrap.dedent("""
+    import asyncio
+    import json
+
+    from app.utils.executors import ProcessPoolFetchExecutor
+    from app.utils.metrics import metrics
+
+
+    async def main():
+        executor = ProcessPoolFetchExecutor(1)
+        try:
+            page = await executor.run("parse_activity_page", owner="owner", repo_name="repo")
+            exists = await executor.run("repo_exists", owner="owner", repo_name="missing-repo")
+        finally:
+            await executor.close()
+        print(json.dumps({"page": page, "exists": exists, "counters": metrics.snapshot()["counters"]}))
+
+
+    if __name__ == "__main__":
+        asyncio.run(main())
+""")
+
+
+def test_process_executor_fetches_in_spawned_workers(fake_github, tmp_path):
+    script = tmp_path / "run_process_executor.py"
+    script.write_text(_SCRIPT)
+
+    result = subprocess.run(
+        [sys.executable, str(script)],
+        cwd=tmp_path,
+        env=os.environ | {"PYTHONPATH": str(ROOT), "GITHUB_API_URL": fake_github, "FETCH_EXECUTOR": "process"},
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+
+    output = json.loads(result.stdout.strip().splitlines()[-1])
+    assert len(output["page"]["items"]) == 100
+    assert "after=cursor1" in output["page"]["next_url"]
+    assert output["exists"] is False
+    # Metrics recorded by the worker process are merged into the parent registry
+    assert output["counters"]['github_requests{status="200"}'] == 1
+    assert output["counters"]['github_requests{status="404"}'] == 1
@@ -0,0 +1,123 @@
+import asyncio
+import dataclasses
+from datetime import date, timedelta
+
+import pytest
+
+from app.schemas.records import RepoActivityRecord, RepositoryRecord
+from app.services import repo_activity
+from app.services.repo_activity import RepositoryActivityService
+from app.utils.columnar import ColumnarActivityStore
+
+REPO_ID = 1
+
+
+class InMemoryActivityService(RepositoryActivityService):
+    """
+    Activity service over an in-memory table, it reads the stored activity in columns.
+    """
+
+    def __init__(self, rows: list[RepoActivityRecord]):
+        super().__init__()
+        self.cache.enabled = True
+        self._columnar = ColumnarActivityStore(10)
+        self.rows = {(row.repository_id, row.date): row for row in rows}
+        self.reads = list()
+        self.versions = 0
+
+    async def execute(self, query: str, *args, fetch: bool = False):
+        repo_id, since = args
+        self.reads.append(since)
+        return [
+            dataclasses.asdict(row)
+            for row in self.rows.values()
+            if row.repository_id == repo_id and row.date >= since
+        ]
+
+    async def execute_many(self, query: str, args: list[tuple]) -> bool:
+        for values in args:
+            row = RepoActivityRecord(*values)
+            self.rows[(row.repository_id, row.date)] = row
+        return True
+
+    async def notify(self) -> None:
+        self.versions += 1
+        self.cache.invalidate(f"test:{self.versions}")
+
+
+def activity(days_ago: int, commits: int = 1) -> RepoActivityRecord:
+    return RepoActivityRecord(date=date.today() - timedelta(days=days_ago), commits=commits, authors=["author"],
+                              repository_id=REPO_ID)
+
+
+def commits(columns) -> int:
+    return int(columns.commits.sum())
+
+
+@pytest.fixture
+def service(monkeypatch):
+    async def mark_activity_synced(repo_ids: list[int]) -> None:
+        pass
+
+    monkeypatch.setattr(repo_activity.repos_service, "mark_activity_synced", mark_activity_synced)
+    return InMemoryActivityService([activity(days_ago) for days_ago in range(1, 11)])
+
+
+def test_columns_are_refreshed_from_recent_days(service):
+    async def run():
+        assert commits(await service._columns(REPO_ID)) == 10
+        await service._write_activities([activity(0)])
+        return commits(await service._columns(REPO_ID))
+
+    assert asyncio.run(run()) == 11
+    assert service.reads[-1] > date.today() - timedelta(days=30)
+
+
+def test_columns_are_refreshed_from_older_written_days(service):
+    async def run():
+        await service._columns(REPO_ID)
+        await service._write_activities([activity(0), activity(200)])
+        return commits(await service._columns(REPO_ID))
+
+    assert asyncio.run(run()) == 12
+    assert service.reads[-1] == date.today() - timedelta(days=200)
+
+
+def test_columns_are_read_in_full_after_writes_of_other_workers(service):
+    async def run():
+        await service._columns(REPO_ID)
+        service.rows[(REPO_ID, activity(200).date)] = activity(200)
+        service._on_notify(None, 0, service.table_name, "other:1")
+        return commits(await service._columns(REPO_ID))
+
+    assert asyncio.run(run()) == 11
+
+
+def test_columns_are_kept_when_the_read_fails(service, monkeypatch):
+    async def run():
+        await service._columns(REPO_ID)
+        await service.notify()
+
+        async def fail(*args, **kwargs):
+            return None
+
+        monkeypatch.setattr(service, "execute", fail)
+        assert commits(await service._columns(REPO_ID)) == 10
+        monkeypatch.undo()
+        return commits(await service._columns(REPO_ID))
+
+    assert asyncio.run(run()) == 10
+    assert service.reads[-1] == date.today() - timedelta(days=366)
+
+
+def test_many_repos_activity_is_empty_when_the_read_fails(service, monkeypatch):
+    async def sync_repositories(full_names: list[str], until: date) -> list[RepositoryRecord]:
+        return [RepositoryRecord(repo=name, owner=name.split("/")[0], id=REPO_ID) for name in full_names]
+
+    async def fail(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(service, "_sync_repositories", sync_repositories)
+    monkeypatch.setattr(service, "execute", fail)
+    result = asyncio.run(service.get_repos_activity(["owner/repo"], date.today() - timedelta(days=7), date.today()))
+    assert result == [{"repo": "owner/repo", "activity": []}]
@@ -0,0 +1,112 @@
+import asyncio
+import dataclasses
+
+import pytest
+
+from app.schemas.records import RepositoryRecord
+from app.schemas.repos import StatsGroupBy
+from app.services.repos import RepositoriesService
+from app.utils import executors
+
+
+class FakeFetchExecutor:
+    def __init__(self, repos: list[RepositoryRecord]):
+        self.repos = repos
+
+    async def run(self, action: str, **payload):
+        assert action == "parse_top_repos"
+        return [dataclasses.asdict(repo) for repo in self.repos]
+
+
+class InMemoryRepositoriesService(RepositoriesService):
+    """
+    Repositories service over an in-memory table, `on_notify` runs while the new version is being published.
+    """
+
+    def __init__(self, rows: list[RepositoryRecord]):
+        super().__init__()
+        self.cache.enabled = True
+        self.rows = {(row.repo, row.owner): row for row in rows}
+        self.on_notify = None
+        self.versions = 0
+
+    async def execute(self, query: str, *args, fetch: bool = False):
+        await asyncio.sleep(0)
+        tracked = [row for row in self.rows.values() if row.position_cur is not None and row.stars is not None]
+        return [dataclasses.asdict(row) for row in sorted(tracked, key=lambda row: -row.stars)]
+
+    async def execute_many(self, query: str, args: list[tuple]) -> bool:
+        for values in args:
+            row = RepositoryRecord(**dict(zip(RepositoryRecord.columns, values)))
+            self.rows[(row.repo, row.owner)] = row
+        return True
+
+    async def notify(self) -> None:
+        self.versions += 1
+        self.cache.invalidate(f"test:{self.versions}")
+        if self.on_notify is not None:
+            await self.on_notify()
+
+
+def repo(name: str, stars: int, language: str = "Python") -> RepositoryRecord:
+    return RepositoryRecord(repo=f"owner/{name}", owner="owner", stars=stars, forks=1, watchers=1, open_issues=0,
+                            language=language)
+
+
+def totals(stats) -> dict:
+    return {item.key: (item.repos, item.stars) for item in stats}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    before = RepositoriesService._prepare_before_pushing([repo("a", 100), repo("b", 50), repo("c", 10, "Go")])
+    service = InMemoryRepositoriesService(before)
+    monkeypatch.setattr(
+        executors, "fetch_executor", FakeFetchExecutor([repo("a", 100), repo("b", 100), repo("c", 10, "Go")])
+    )
+    return service
+
+
+def test_stats_diff_is_applied_incrementally(service):
+    async def run():
+        assert totals(await service.get_stats(StatsGroupBy.language)) == {"Python": (2, 150), "Go": (1, 10)}
+        await service.update_top_repos()
+        # Updated from the diff, not rebuilt
+        assert service._stats is not None
+        return totals(await service.get_stats(StatsGroupBy.language))
+
+    assert asyncio.run(run()) == {"Python": (2, 200), "Go": (1, 10)}
+
+
+def test_stats_rebuilt_during_the_update_are_not_updated_twice(service):
+    async def read_stats():
+        await service.get_stats(StatsGroupBy.language)
+
+    async def run():
+        service.on_notify = read_stats
+        await service.update_top_repos()
+        return totals(await service.get_stats(StatsGroupBy.language))
+
+    assert asyncio.run(run()) == {"Python": (2, 200), "Go": (1, 10)}
+
+
+def test_stats_are_dropped_on_notifications_of_other_workers(service):
+    async def run():
+        await service.get_stats(StatsGroupBy.language)
+        service.rows[("owner/c", "owner")] = dataclasses.replace(service.rows[("owner/c", "owner")], stars=30)
+        service._on_notify(None, 0, service.table_name, "other-worker:1")
+        return totals(await service.get_stats(StatsGroupBy.language))
+
+    assert asyncio.run(run())["Go"] == (1, 30)
+
+
+def test_stats_are_not_kept_while_the_cache_is_disabled(service):
+    service.cache.enabled = False
+
+    async def run():
+        await service.get_stats(StatsGroupBy.language)
+        assert service._stats is None
+        await service.update_top_repos()
+        return totals(await service.get_stats(StatsGroupBy.language))
+
+    assert asyncio.run(run()) == {"Python": (2, 200), "Go": (1, 10)}
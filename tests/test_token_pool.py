@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from app.core.exceptions import RateLimitExceeded
+from app.utils.token_pool import TokenPool
+
+
+def headers(remaining: int, resource: str = "core", reset_in: float = 3600) -> dict:
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(time.time() + reset_in),
+        "X-RateLimit-Resource": resource,
+    }
+
+
+def test_empty_pool_sends_unauthenticated_requests():
+    pool = TokenPool([])
+
+    assert pool.acquire() is None
+    assert pool.update(None, 200, headers(0)) is False
+
+
+def test_token_with_the_largest_remaining_quota_is_used():
+    pool = TokenPool(["a", "b"])
+    pool.update(pool.acquire(), 200, headers(100))
+
+    assert pool.acquire().token == "b"
+
+
+def test_reservations_spread_concurrent_requests():
+    pool = TokenPool(["a", "b"])
+
+    assert {pool.acquire().token, pool.acquire().token} == {"a", "b"}
+
+
+def test_exhausted_token_is_quarantined_and_skipped():
+    pool = TokenPool(["a", "b"])
+    state = pool.acquire()
+
+    assert pool.update(state, 403, headers(0)) is True
+    assert pool.acquire().token != state.token
+    pool.update(pool.acquire(), 403, headers(0))
+    with pytest.raises(RateLimitExceeded):
+        pool.acquire()
+
+
+def test_search_quota_does_not_affect_core_requests():
+    pool = TokenPool(["a", "b"])
+    pool.update(pool.acquire(), 200, headers(4000))
+    # The search quota of "b" is used up by a successful request
+    search = pool.acquire("search")
+    assert search.token == "a"
+    pool.update(search, 200, headers(0, "search"), "search")
+
+    assert pool.acquire().token == "b"
+    assert pool.acquire().token == "b"
+    assert pool.acquire("search").token == "b"
+    assert pool.dump()[0]["core"][0] == 4000
+
+
+def test_reservation_is_released_without_rate_limit_headers():
+    pool = TokenPool(["a"])
+    for _ in range(6000):
+        pool.update(pool.acquire(), 200, {})
+
+    assert pool.dump()[0]["core"][0] == 5000
+    assert pool.acquire().token == "a"
+
+
+def test_reservation_is_released_when_the_request_fails():
+    pool = TokenPool(["a"])
+    state = pool.acquire()
+    pool.release(state)
+
+    assert pool.dump()[0]["core"][0] == 5000
+
+
+def test_load_keeps_the_later_quarantine():
+    pool, other = TokenPool(["a", "b"]), TokenPool(["a", "b"])
+    pool.update(pool.acquire(), 403, headers(0, reset_in=600))
+    quarantined_until = pool.dump()[0]["core"][2]
+    other.update(other.acquire(), 200, headers(10))
+
+    pool.load(other.dump())
+
+    remaining, _, until = pool.dump()[0]["core"]
+    assert (remaining, until) == (10, quarantined_until)
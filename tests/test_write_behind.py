@@ -0,0 +1,98 @@
+import asyncio
+
+from app.utils.write_behind import WriteBehindQueue
+
+
+class Writer:
+    def __init__(self, failures: int = 0):
+        self.batches = list()
+        self.failures = failures
+        self.started = asyncio.Event()
+        self.blocked: asyncio.Event | None = None
+
+    async def __call__(self, rows: list) -> bool:
+        self.started.set()
+        if self.blocked is not None:
+            await self.blocked.wait()
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.batches.append(list(rows))
+        return True
+
+
+def queue(writer: Writer, max_size: int = 2, max_delay: float = 0.01) -> WriteBehindQueue:
+    return WriteBehindQueue(name="test", flush=writer, max_size=max_size, max_delay=max_delay, max_retries=0)
+
+
+def test_rows_are_written_in_batches():
+    async def run():
+        writer = Writer()
+        writes = queue(writer)
+        writes.put([1, 2, 3])
+        await asyncio.sleep(0.05)
+        await writes.drain()
+        return writer.batches, writes.pending()
+
+    assert asyncio.run(run()) == ([[1, 2], [3]], [])
+
+
+def test_batch_being_written_is_pending_but_not_queued():
+    async def run():
+        writer = Writer()
+        writer.blocked = asyncio.Event()
+        writes = queue(writer)
+        writes.put([1, 2, 3])
+        await writer.started.wait()
+        state = writes.pending(), list(writes.queued())
+
+        writer.blocked.set()
+        await writes.drain()
+        return state
+
+    assert asyncio.run(run()) == ([1, 2, 3], [3])
+
+
+def test_failed_batch_is_written_with_the_next_one():
+    async def run():
+        writer = Writer(failures=1)
+        writes = queue(writer, max_size=10, max_delay=0.05)
+        writes.put([1])
+        await writer.started.wait()
+        await asyncio.sleep(0)
+        queued = list(writes.queued())
+        writes.put([2])
+        await writes.drain()
+        return queued, writer.batches
+
+    assert asyncio.run(run()) == ([1], [[1, 2]])
+
+
+def test_cancelled_batch_is_requeued():
+    async def run():
+        writer = Writer()
+        writer.blocked = asyncio.Event()
+        writes = queue(writer)
+        writes.put([1, 2])
+        await writer.started.wait()
+
+        writes._task.cancel()
+        await asyncio.gather(writes._task, return_exceptions=True)
+        queued = list(writes.queued())
+
+        writer.blocked.set()
+        await writes.drain()
+        return queued, writer.batches
+
+    assert asyncio.run(run()) == ([1, 2], [[1, 2]])
+
+
+def test_drain_drops_rows_that_cannot_be_written():
+    async def run():
+        writer = Writer(failures=1)
+        writes = queue(writer, max_delay=60)
+        writes.put([1])
+        await writes.drain()
+        return writes.pending(), writer.batches
+
+    assert asyncio.run(run()) == ([], [])
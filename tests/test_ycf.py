@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import zipfile
+from pathlib import Path
+
+from ycf.build import build, sources
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_SCRIPT = textwrap.dedent("""
+    import asyncio
+    import json
+
+    from main import handler
+
+
+    def invoke(action, payload):
+        event = {"httpMethod": "POST", "queryStringParameters": {"action": action}, "body": json.dumps(payload)}
+        return asyncio.run(handler(event, None))
+
+
+    print(json.dumps([
+        invoke("parse_activity_page", {"owner": "owner", "repo_name": "repo"}),
+        invoke("repo_exists", {"owner": "owner", "repo_name": "missing-repo"}),
+        invoke("parse_activity", {"owner": "owner", "repo_name": "repo"}),
+        invoke("repo_exists", {"owner": "owner"}),
+    ]))
+""")
+
+
+def test_bundle_is_built_from_sources():
+    with zipfile.ZipFile(ROOT / "ycf.zip") as bundle:
+        members = {name: bundle.read(name) for name in bundle.namelist()}
+
+    assert members == {name: path.read_bytes() for name, path in sources().items()}, "Rebuild it: python -m ycf.build"
+
+
+def test_bundle_runs_fetch_actions(fake_github, tmp_path):
+    build(tmp_path / "ycf.zip")
+    with zipfile.ZipFile(tmp_path / "ycf.zip") as bundle:
+        bundle.extractall(tmp_path / "function")
+
+    env = {key: value for key, value in os.environ.items() if key not in ("PYTHONPATH", "YCF_URL", "FETCH_EXECUTOR")}
+    result = subprocess.run(
+        [sys.executable, "-c", _SCRIPT],
+        cwd=tmp_path / "function",
+        env=env | {"GITHUB_API_URL": fake_github, "GITHUB_RETRIES": "0"},
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+
+    page, exists, unknown, invalid = json.loads(result.stdout.strip().splitlines()[-1])
+    assert page["statusCode"] == 200
+    assert len(json.loads(page["body"])["items"]) == 100
+    assert (exists["statusCode"], json.loads(exists["body"])) == (200, False)
+    assert unknown["statusCode"] == 400
+    assert invalid["statusCode"] == 400
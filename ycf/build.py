@@ -0,0 +1,55 @@
+"""
+Builds ycf.zip, the code of the Yandex Cloud function: its entry point (ycf/main.py), the application package and
+the requirements of the application. The function runs the fetch actions of the application itself, so it can't
+drift from the local executors.
+
+Usage: python -m ycf.build [--output ycf.zip]
+"""
+
+import argparse
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def sources() -> dict[str, Path]:
+    """
+    Lists the files of the bundle.
+
+    :return: Source files by their paths in the archive.
+    """
+
+    files = {"main.py": ROOT / "ycf" / "main.py", "requirements.txt": ROOT / "requirements.txt"}
+    for path in sorted((ROOT / "app").rglob("*.py")):
+        files[path.relative_to(ROOT).as_posix()] = path
+
+    return files
+
+
+def build(output: Path) -> None:
+    """
+    Writes the bundle.
+
+    :param output: Path of the archive.
+    """
+
+    with zipfile.ZipFile(output, "w") as bundle:
+        for name, path in sources().items():
+            # Fixed timestamps, so the archive changes only with the sources
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            bundle.writestr(info, path.read_bytes())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", type=Path, default=ROOT / "ycf.zip")
+    args = parser.parse_args()
+
+    build(args.output)
+
+
+if __name__ == "__main__":
+    main()
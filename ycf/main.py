@@ -0,0 +1,48 @@
+"""
+Entry point of the Yandex Cloud function (`main.handler`), packed into ycf.zip with the application by `ycf.build`.
+
+HTTP invocations run a fetch action of the remote fetch executor with the code path shared by all executors
+(app.utils.executors.handle), timer invocations update the top repositories and store the snapshots of the movers.
+"""
+
+import asyncio
+import base64
+import json
+
+from app.core.exceptions import GitHubUnavailable, RateLimitExceeded
+from app.services.movers import movers_service
+from app.services.repos import repos_service
+from app.utils.executors import handle
+
+
+def _response(status_code: int, result, headers: dict = None) -> dict:
+    return {
+        "statusCode": status_code,
+        "headers": {"Content-Type": "application/json"} | (headers or dict()),
+        "body": json.dumps(result),
+    }
+
+
+async def handler(event: dict, context) -> dict:
+    # Errors are answered with the status codes expected by RemoteExecutor, as by the stand-in worker (app.worker)
+    result = None
+
+    try:
+        if event.get("httpMethod") == "POST":
+            action = (event.get("queryStringParameters") or dict()).get("action", None)
+            body = event.get("body") or "{}"
+            if event.get("isBase64Encoded", False):
+                body = base64.b64decode(body)
+            result = await asyncio.to_thread(handle, action, json.loads(body))
+
+        if event.get("messages", None):
+            await repos_service.update_top_repos()
+            await movers_service.update_movers()
+    except (ValueError, KeyError) as e:
+        return _response(400, {"message": f"Bad request: {e}"})
+    except RateLimitExceeded:
+        return _response(429, {"message": "Exceeded API rate limit"})
+    except GitHubUnavailable as e:
+        return _response(503, {"message": "github.com is unavailable"}, {"Retry-After": str(e.retry_after)})
+
+    return _response(200, result)